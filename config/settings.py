@@ -32,6 +32,7 @@ class AnalyticsConfig:
 class UIConfig:
     refresh_interval: int = 300
     max_records_display: int = 10000
+    preview_limit: int = 1000
 
 class AppSettings:
     def __init__(self, config_path: Optional[str] = None):
@@ -91,7 +92,8 @@ class AppSettings:
         ui_config = config_data.get('ui', {})
         self.ui = UIConfig(
             refresh_interval=int(ui_config.get('refresh_interval', 300)),
-            max_records_display=int(ui_config.get('max_records_display', 10000))
+            max_records_display=int(ui_config.get('max_records_display', 10000)),
+            preview_limit=int(ui_config.get('preview_limit', 1000))
         )
         
         # Load rules
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
@@ -77,6 +77,40 @@ class AnalysisResult:
         """Verifica se há problemas detectados"""
         return bool(self.alerts and any(a.severity in ['warning', 'critical'] for a in self.alerts))
 
+@dataclass(slots=True, frozen=True)
+class KPIResult:
+    """KPIs financeiros consolidados do período (imutável, sem __dict__)"""
+    total_volume: float = 0
+    net_flow: float = 0
+    total_entries: float = 0
+    total_exits: float = 0
+    operation_count: int = 0
+    active_funds: int = 0
+    
+    # Liquidez
+    liquidity_ratio: float = 0
+    min_balance: float = 0
+    avg_balance: float = 0
+    critical_funds_count: int = 0
+    liquidity_risk_level: str = 'Desconhecido'
+    
+    # Concentração
+    concentration_index: float = 0
+    top_fund_percentage: float = 0
+    top_3_funds_percentage: float = 0
+    concentration_risk_level: str = 'Desconhecido'
+    
+    # Performance operacional
+    daily_avg_operations: float = 0
+    operational_efficiency: float = 0
+    flow_volatility: float = 0
+    operational_health: str = 'Desconhecida'
+    
+    # Metadados
+    last_update: Optional[datetime] = None
+    period_days: int = 0
+    data_quality_score: float = 0
+
 @dataclass
 class User:
     id: int
@@ -110,12 +144,6 @@ class User:
 class DashboardState:
     authenticated: bool = False
     current_user: Optional[User] = None
-    selected_funds: List[str] = None
-    selected_custodians: List[str] = None
-    date_range: tuple = None
-    
-    def __post_init__(self):
-        if self.selected_funds is None:
-            self.selected_funds = []
-        if self.selected_custodians is None:
-            self.selected_custodians = []
\ No newline at end of file
+    selected_funds: List[str] = field(default_factory=list)
+    selected_custodians: List[str] = field(default_factory=list)
+    date_range: tuple = None
\ No newline at end of file
@@ -2,14 +2,14 @@ import pandas as pd
 from typing import Optional, Tuple, Any
 from config.settings import DatabaseConfig
 from utils.logging_utils import Log
-from utils.mysql_connector_utils import MySQLConnector
+from utils.mysql_connector_utils import get_mysql_connector
 
 logger = Log.get_logger(__name__)
 
 class DatabaseManager:
     def __init__(self, config: DatabaseConfig):
         self.config = config
-        self.connector = MySQLConnector(
+        self.connector = get_mysql_connector(
             host=config.host,
             user=config.user,
             password=config.password,
@@ -8,4 +8,14 @@ class FilterParams:
     end_date: date
     funds: Optional[List[str]] = None
     custodians: Optional[List[str]] = None
-    limit: Optional[int] = None
\ No newline at end of file
+    limit: Optional[int] = None
+    
+    def cache_key(self) -> tuple:
+        """Chave determinística para hash_funcs de caches Streamlit"""
+        return (
+            self.start_date,
+            self.end_date,
+            tuple(sorted(self.funds or ())),
+            tuple(sorted(self.custodians or ())),
+            self.limit
+        )
\ No newline at end of file
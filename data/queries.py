@@ -47,6 +47,50 @@ class QueryBuilder:
         
         return base_query, tuple(params)
     
+    def build_kpi_aggregates_query(self, filters: FilterParams) -> Tuple[str, Tuple]:
+        """Query para KPIs agregados por fundo e dia (sem trafegar lançamentos)"""
+        base_query = """
+        SELECT 
+            nmfundo,
+            DATE(dt_lancamento) as date,
+            SUM(COALESCE(entrada, 0)) as entrada,
+            SUM(COALESCE(saida, 0)) as saida,
+            MIN(COALESCE(saldo, 0)) as saldo_min,
+            MAX(COALESCE(saldo, 0)) as saldo_max,
+            SUM(COALESCE(saldo, 0)) as saldo_sum,
+            COUNT(*) as operacoes,
+            SUM(COALESCE(saldo, 0) < 0) as saldos_negativos,
+            SUM(dt_lancamento > NOW()) as datas_futuras,
+            SUM(
+                (id_origem IS NULL) + (fonte IS NULL) + (id_carteira IS NULL) +
+                (nmfundo IS NULL) + (cnpj IS NULL) + (lancamento IS NULL)
+            ) as campos_nulos
+        FROM DW_STAGING.vw_extrato
+        WHERE DATE(dt_lancamento) BETWEEN %s AND %s
+        """
+        
+        params = [filters.start_date, filters.end_date]
+        conditions = []
+        
+        if filters.funds:
+            fund_placeholders = ','.join(['%s'] * len(filters.funds))
+            conditions.append(f"nmfundo IN ({fund_placeholders})")
+            params.extend(filters.funds)
+        
+        if filters.custodians:
+            custodian_placeholders = ','.join(['%s'] * len(filters.custodians))
+            conditions.append(f"fonte IN ({custodian_placeholders})")
+            params.extend(filters.custodians)
+        
+        if conditions:
+            base_query += " AND " + " AND ".join(conditions)
+        
+        base_query += """
+        GROUP BY nmfundo, DATE(dt_lancamento)
+        """
+        
+        return base_query, tuple(params)
+    
     def build_liquidity_query(self, filters: FilterParams) -> Tuple[str, Tuple]:
         """Query para métricas de liquidez"""
         base_query = """
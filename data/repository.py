@@ -1,15 +1,54 @@
 import pandas as pd
 import logging
+import streamlit as st
 from typing import List, Dict, Optional, Tuple
 from datetime import date, datetime, timedelta
 
 from .database import DatabaseManager
 from .queries import QueryBuilder
 from .models import FilterParams
-from config.settings import DatabaseConfig
+from config.settings import DatabaseConfig, AnalyticsConfig
 
 logger = logging.getLogger(__name__)
 
+@st.cache_data(ttl=AnalyticsConfig.cache_ttl, show_spinner=False,
+               hash_funcs={FilterParams: FilterParams.cache_key})
+def _load_extract_data(_repository: "DataRepository", filters: FilterParams) -> pd.DataFrame:
+    """Busca e processa extrato; resultado compartilhado entre KPIs e páginas (erros propagam e não são cacheados)"""
+    query, params = _repository.query_builder.build_extract_query(filters)
+    df = _repository.db.execute_query(query, params)
+    if not df.empty:
+        df = _repository._process_extract_data(df)
+    return df
+
+@st.cache_data(ttl=AnalyticsConfig.cache_ttl, show_spinner=False,
+               hash_funcs={FilterParams: FilterParams.cache_key})
+def _load_kpi_aggregates(_repository: "DataRepository", filters: FilterParams) -> pd.DataFrame:
+    """Busca agregados por fundo/dia calculados no banco"""
+    query, params = _repository.query_builder.build_kpi_aggregates_query(filters)
+    df = _repository.db.execute_query(query, params)
+    if not df.empty:
+        df['date'] = pd.to_datetime(df['date'])
+        numeric_columns = [c for c in df.columns if c not in ('nmfundo', 'date')]
+        df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors='coerce').fillna(0).astype('float64')
+    return df
+
+@st.cache_data(ttl=AnalyticsConfig.cache_ttl, show_spinner=False,
+               hash_funcs={FilterParams: FilterParams.cache_key})
+def _load_extract_rollup(_repository: "DataRepository", filters: FilterParams) -> pd.DataFrame:
+    """Consolida o extrato por fundo, dia e tipo de lançamento"""
+    df = _load_extract_data(_repository, filters)
+    if df.empty:
+        return pd.DataFrame(columns=['nmfundo', 'data', 'tipo_lancamento', 'sum', 'count'])
+    
+    # Chave diária como datetime64[D] (inteiros) em vez de objetos datetime.date
+    day_key = pd.Series(df['dt_lancamento'].values.astype('datetime64[D]'), index=df.index, name='data')
+    return (
+        df.groupby(['nmfundo', day_key, 'tipo_lancamento'], observed=True, dropna=False, sort=False)['valor']
+        .agg(['sum', 'count'])
+        .reset_index()
+    )
+
 class DataRepository:
     def __init__(self, db_config: DatabaseConfig):
         self.db = DatabaseManager(db_config)
@@ -18,49 +57,50 @@ class DataRepository:
     def get_extract_data(self, filters: FilterParams) -> pd.DataFrame:
         """Busca dados de extrato com filtros aplicados"""
         try:
-            query, params = self.query_builder.build_extract_query(filters)
-            df = self.db.execute_query(query, params)
-            if not df.empty:
-                df = self._process_extract_data(df)
-            return df
+            return _load_extract_data(self, filters)
         except Exception as e:
             logger.error(f"Erro ao buscar dados de extrato: {e}")
             return pd.DataFrame()
     
-    def get_available_funds(self) -> List[str]:
-        """Retorna lista de fundos disponíveis"""
-        query = """
-        SELECT DISTINCT nmfundo 
-        FROM DW_STAGING.vw_extrato 
-        WHERE nmfundo IS NOT NULL 
-        AND nmfundo != ''
-        ORDER BY nmfundo
-        LIMIT 1000
-        """
-        
+    def get_kpi_aggregates(self, filters: FilterParams) -> pd.DataFrame:
+        """Retorna somas, extremos de saldo e contagens por fundo/dia agregados em SQL (erros propagam)"""
+        return _load_kpi_aggregates(self, filters)
+    
+    def get_extract_rollup(self, filters: FilterParams) -> pd.DataFrame:
+        """Retorna soma e quantidade de lançamentos por fundo/dia/tipo"""
         try:
-            df = self.db.execute_query(query)
-            return df['nmfundo'].tolist() if not df.empty else []
+            return _load_extract_rollup(self, filters)
         except Exception as e:
-            logger.error(f"Erro ao buscar fundos: {e}")
-            return []
+            logger.error(f"Erro ao consolidar dados de extrato: {e}")
+            return pd.DataFrame(columns=['nmfundo', 'data', 'tipo_lancamento', 'sum', 'count'])
     
-    def get_available_custodians(self) -> List[str]:
-        """Retorna lista de custodiantes disponíveis"""
+    def get_available_filter_options(self) -> Tuple[List[str], List[str]]:
+        """Retorna fundos e custodiantes disponíveis em uma única consulta (erros propagam)"""
         query = """
-        SELECT DISTINCT fonte 
-        FROM DW_STAGING.vw_extrato 
-        WHERE fonte IS NOT NULL 
-        AND fonte != ''
-        ORDER BY fonte
+        (SELECT 'fundo' as tipo, nmfundo as valor
+         FROM DW_STAGING.vw_extrato
+         WHERE nmfundo IS NOT NULL
+         AND nmfundo != ''
+         GROUP BY nmfundo
+         ORDER BY nmfundo
+         LIMIT 1000)
+        UNION ALL
+        (SELECT 'custodiante' as tipo, fonte as valor
+         FROM DW_STAGING.vw_extrato
+         WHERE fonte IS NOT NULL
+         AND fonte != ''
+         GROUP BY fonte)
+        ORDER BY tipo, valor
         """
         
-        try:
-            df = self.db.execute_query(query)
-            return df['fonte'].tolist() if not df.empty else []
-        except Exception as e:
-            logger.error(f"Erro ao buscar custodiantes: {e}")
-            return []
+        df = self.db.execute_query(query)
+        if df.empty:
+            return [], []
+        
+        # Ordem (collation do banco) já vem do ORDER BY externo da UNION
+        funds = df.loc[df['tipo'] == 'fundo', 'valor'].tolist()
+        custodians = df.loc[df['tipo'] == 'custodiante', 'valor'].tolist()
+        return funds, custodians
     
     def get_liquidity_metrics(self, filters: FilterParams) -> pd.DataFrame:
         """Busca métricas de liquidez"""
@@ -113,13 +153,13 @@ class DataRepository:
         """Processa dados de extrato adicionando campos calculados"""
         # Converter tipos
         df['dt_lancamento'] = pd.to_datetime(df['dt_lancamento'])
-        df['entrada'] = pd.to_numeric(df['entrada'], errors='coerce').fillna(0)
-        df['saida'] = pd.to_numeric(df['saida'], errors='coerce').fillna(0)
-        df['saldo'] = pd.to_numeric(df['saldo'], errors='coerce').fillna(0)
+        df['entrada'] = pd.to_numeric(df['entrada'], errors='coerce').fillna(0).astype('float64')
+        df['saida'] = pd.to_numeric(df['saida'], errors='coerce').fillna(0).astype('float64')
+        df['saldo'] = pd.to_numeric(df['saldo'], errors='coerce').fillna(0).astype('float64')
         
         # Campos calculados
         df['valor'] = df['entrada'] - df['saida']
-        df['tipo_lancamento'] = df.apply(self._determine_operation_type, axis=1)
+        df['tipo_lancamento'] = df.apply(self._determine_operation_type, axis=1).astype('category')
         df['categoria'] = df['lancamento'].apply(self._categorize_operation)
         df['data'] = df['dt_lancamento'].dt.date
         
@@ -190,6 +230,12 @@ class DataRepository:
         
         return query, tuple(params)
     
+    def clear_cache(self):
+        """Invalida dados de extrato em cache"""
+        _load_extract_data.clear()
+        _load_kpi_aggregates.clear()
+        _load_extract_rollup.clear()
+    
     def is_connected(self) -> bool:
         """Verifica se há conexão com o banco"""
         return self.db.is_connected()
@@ -2,16 +2,32 @@ import streamlit as st
 import logging
 from pathlib import Path
 
-from config.settings import AppSettings
+from config.settings import AppSettings, DatabaseConfig, AnalyticsConfig
 from core.auth_service import AuthService
 from core.analytics_engine import AnalyticsEngine
 from data.repository import DataRepository
+from ui.charts import ChartManager
 from ui.dashboard import Dashboard
 from ui.components import UIComponents
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@st.cache_resource
+def get_repository(db_config: DatabaseConfig) -> DataRepository:
+    """Repositório (e pool de conexões) compartilhado entre reruns e sessões"""
+    return DataRepository(db_config)
+
+@st.cache_resource
+def get_analytics_engine(analytics_config: AnalyticsConfig) -> AnalyticsEngine:
+    """Motor de análises compartilhado entre reruns e sessões"""
+    return AnalyticsEngine(analytics_config)
+
+@st.cache_resource
+def get_chart_manager() -> ChartManager:
+    """Gerenciador de gráficos compartilhado entre reruns e sessões"""
+    return ChartManager()
+
 def main():
     """Ponto de entrada da aplicação"""
     st.set_page_config(
@@ -23,9 +39,9 @@ def main():
     
     # Inicializar serviços
     settings = AppSettings()
-    repository = DataRepository(settings.database)
+    repository = get_repository(settings.database)
     auth_service = AuthService(repository, settings.security)
-    analytics_engine = AnalyticsEngine(settings.analytics)
+    analytics_engine = get_analytics_engine(settings.analytics)
     
     # Aplicar estilos
     UIComponents.apply_global_styles()
@@ -35,7 +51,8 @@ def main():
         auth_service=auth_service,
         repository=repository,
         analytics_engine=analytics_engine,
-        settings=settings
+        settings=settings,
+        chart_manager=get_chart_manager()
     )
     
     # Executar aplicação
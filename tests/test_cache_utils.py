@@ -0,0 +1,33 @@
+"""
+Testes de CacheManager.create_cache_key
+"""
+import threading
+
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('pandas')
+
+from utils.cache_utils import CacheManager
+
+def test_cache_key_ignores_dict_insertion_order():
+    """Dicts aninhados iguais com ordem de inserção diferente geram a mesma chave"""
+    first = CacheManager.create_cache_key({'fundo': 'A', 'filtros': {'inicio': 1, 'fim': 2}}, opcoes=[{'a': 1, 'b': 2}])
+    second = CacheManager.create_cache_key({'filtros': {'fim': 2, 'inicio': 1}, 'fundo': 'A'}, opcoes=[{'b': 2, 'a': 1}])
+    assert first == second
+
+def test_cache_key_distinguishes_different_dicts():
+    """Valores ou tipos de chave diferentes continuam gerando chaves diferentes"""
+    assert CacheManager.create_cache_key({'a': 1}) != CacheManager.create_cache_key({'a': 2})
+    assert CacheManager.create_cache_key({1: 'x'}) != CacheManager.create_cache_key({'1': 'x'})
+
+def test_cache_key_falls_back_for_unpicklable_arguments():
+    """Locks, lambdas e objetos com estado não serializável usam o caminho via str"""
+    class Repository:
+        def __init__(self):
+            self.lock = threading.Lock()
+    
+    lock = threading.Lock()
+    key = CacheManager.create_cache_key(Repository(), lock, callback=lambda value: value)
+    assert isinstance(key, str) and len(key) == 32
+    assert CacheManager.create_cache_key(lock) == CacheManager.create_cache_key(lock)
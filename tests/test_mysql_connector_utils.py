@@ -0,0 +1,105 @@
+"""
+Testes do MySQLConnector (healthcheck com a extensão C do driver)
+"""
+import os
+from unittest import mock
+
+import pytest
+
+mysql_connector = pytest.importorskip('mysql.connector')
+
+from utils.mysql_connector_utils import MySQLConnector
+
+# Extensão C instalada mas que falha ao carregar (ex.: OpenSSL incompatível) levanta ImportError
+try:
+    from mysql.connector import connection_cext as cext
+except ImportError:
+    cext = None
+
+requires_cext = pytest.mark.skipif(
+    cext is None or not mysql_connector.HAVE_CEXT, reason="extensão C do mysql-connector indisponível"
+)
+
+def _connector_with(connection) -> MySQLConnector:
+    """Connector sem pool real: o pool entrega sempre a conexão informada"""
+    connector = object.__new__(MySQLConnector)
+    connector.config = {'pool_timeout': 1}
+    connector.pool = mock.Mock(acquire=mock.Mock(return_value=connection))
+    return connector
+
+@requires_cext
+def test_test_connection_pings_c_extension_connection():
+    """CMySQLConnection não implementa cmd_ping: o healthcheck deve usar ping"""
+    connection = cext.CMySQLConnection()
+    with mock.patch.object(cext.CMySQLConnection, 'ping') as ping:
+        assert _connector_with(connection).test_connection() is True
+    ping.assert_called_once_with(reconnect=False)
+
+@requires_cext
+def test_test_connection_reports_unavailable_connection():
+    """Conexão C sem servidor: healthcheck retorna False em vez de propagar"""
+    connection = cext.CMySQLConnection()
+    assert _connector_with(connection).test_connection() is False
+
+@requires_cext
+@pytest.mark.skipif(not os.getenv('MYSQL_TEST_HOST'), reason="MYSQL_TEST_HOST não definido")
+def test_test_connection_against_server():
+    """Healthcheck em servidor real com conexões da extensão C (use_pure=False)"""
+    connector = MySQLConnector(host=os.getenv('MYSQL_TEST_HOST'), pool_size=1, max_pool_size=1)
+    try:
+        with connector.get_connection() as conn:
+            assert isinstance(conn, cext.CMySQLConnection)
+        assert connector.test_connection() is True
+    finally:
+        connector.close()
+
+class _RecordingConnection:
+    """Conexão falsa: escapa como a extensão C (prepare_for_mysql) e registra os statements"""
+    python_charset = 'utf-8'
+    
+    def __init__(self):
+        self.statements = []
+        self.in_transaction = False
+    
+    def prepare_for_mysql(self, params):
+        return [b'NULL' if v is None else repr(v).encode('utf-8') for v in params]
+    
+    def cursor(self, **kwargs):
+        connection = self
+        
+        class Cursor:
+            rowcount = 0
+            
+            def execute(self, operation, params=None):
+                connection.statements.append(operation)
+                self.rowcount = operation.count(b'(') - 1
+            
+            def executemany(self, operation, seq_params):
+                raise AssertionError("executemany não deve ser usado para INSERT/REPLACE de uma tupla")
+        
+        return Cursor()
+
+def _batch_connector(connection, max_allowed_packet: int) -> MySQLConnector:
+    """Connector sem servidor para execute_many, com max_allowed_packet fixo"""
+    connector = _connector_with(connection)
+    connector.config['autocommit'] = True
+    connector._holder = mock.Mock(max_allowed_packet=max_allowed_packet)
+    return connector
+
+def test_execute_many_sends_replace_as_single_statement_per_batch():
+    """REPLACE (não reescrito pelo driver) vai como um único multi-VALUES"""
+    connection = _RecordingConnection()
+    rows = [(1, 'a'), (2, "b'c"), (3, None)]
+    affected = _batch_connector(connection, 1 << 20).execute_many("REPLACE INTO t (id, nome) VALUES (%s, %s)", rows)
+    assert connection.statements == [b"REPLACE INTO t (id, nome) VALUES (1, 'a'),(2, \"b'c\"),(3, NULL)"]
+    assert affected == 3
+
+def test_execute_many_splits_by_max_allowed_packet():
+    """Lotes respeitam max_allowed_packet e cada lote é um único statement"""
+    connection = _RecordingConnection()
+    rows = [(i, 'x' * 50) for i in range(40)]
+    connector = _batch_connector(connection, MySQLConnector.PACKET_MARGIN + 600)
+    connector.execute_many("INSERT t (id, nome) VALUE (%s, %s)", rows)
+    assert len(connection.statements) > 1
+    assert all(len(stmt) <= 600 + MySQLConnector.PACKET_MARGIN for stmt in connection.statements)
+    assert sum(stmt.count(b"'x") for stmt in connection.statements) == len(rows)
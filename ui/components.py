@@ -1,6 +1,12 @@
 import streamlit as st
+import pandas as pd
 from typing import Dict, List, Optional
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _dataframe_to_csv(df: pd.DataFrame) -> bytes:
+    """Serializa DataFrame para CSV (servido via HTTP pelo download_button)"""
+    return df.to_csv(index=False).encode('utf-8')
+
 class UIComponents:
     
     @staticmethod
@@ -182,15 +188,30 @@ class UIComponents:
                 )
     
     @staticmethod
-    def render_data_table(df, title: str = "", height: int = 400):
-        """Renderiza tabela de dados com título"""
+    def render_data_table(df, title: str = "", height: int = 400, preview_limit: Optional[int] = None):
+        """Renderiza tabela de dados com título
+        
+        Com preview_limit, apenas as primeiras linhas trafegam pelo websocket;
+        o conjunto completo fica disponível para download via HTTP.
+        """
         if title:
             UIComponents.render_section_title(title)
         
-        if not df.empty:
-            st.dataframe(df, use_container_width=True, height=height)
-        else:
+        if df.empty:
             st.info("Nenhum dado disponível para exibição")
+            return
+        
+        if preview_limit and len(df) > preview_limit:
+            st.dataframe(df.head(preview_limit), use_container_width=True, height=height)
+            st.caption(f"Exibindo {preview_limit:,} de {len(df):,} registros")
+            st.download_button(
+                "📥 Baixar completo",
+                data=_dataframe_to_csv(df),
+                file_name="extrato.csv",
+                mime="text/csv"
+            )
+        else:
+            st.dataframe(df, use_container_width=True, height=height)
     
     @staticmethod
     def render_loading_spinner(message: str = "Carregando dados..."):
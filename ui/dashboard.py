@@ -16,13 +16,14 @@ from .kpis import KPIManager
 
 class Dashboard:
     def __init__(self, auth_service: AuthService, repository: DataRepository, 
-                 analytics_engine: AnalyticsEngine, settings: AppSettings):
+                 analytics_engine: AnalyticsEngine, settings: AppSettings,
+                 chart_manager: Optional[ChartManager] = None):
         self.auth_service = auth_service
         self.repository = repository
         self.analytics_engine = analytics_engine
         self.settings = settings
         self.filter_manager = FilterManager(repository)
-        self.chart_manager = ChartManager()
+        self.chart_manager = chart_manager or ChartManager()
         self.kpi_manager = KPIManager(repository)
         
         # Inicializar estado
@@ -177,31 +178,49 @@ class Dashboard:
         with col3:
             if st.button("🚪 Sair"):
                 self.auth_service.logout()
-                st.session_state.dashboard_state = DashboardState()
+                # Limpar apenas dados de autenticação; filtros permanecem para o próximo login
+                state = st.session_state.dashboard_state
+                state.authenticated = False
+                state.current_user = None
                 st.rerun()
     
     def _render_sidebar_filters(self):
         """Renderiza filtros na sidebar"""
         st.markdown("### Filtros")
         
+        self._render_filter_controls()
+        
+        # Botão de atualização
+        st.markdown("---")
+        if st.button("🔄 Atualizar Dados"):
+            # Invalida apenas caches de dados; listas de fundos/custodiantes permanecem em cache
+            self.kpi_manager.clear_cache()
+            st.rerun()
+    
+    @st.fragment
+    def _render_filter_controls(self):
+        """Renderiza widgets de filtro e aplica a seleção à sessão
+        
+        Executa como fragment (não como form): presets, "Todos" e a busca de fundos
+        atualizam os widgets dependentes na hora, reexecutando só os filtros; apenas
+        "Aplicar filtros" grava a seleção e reexecuta o app.
+        """
         # Período
         date_range = self.filter_manager.create_date_filter(
             default_days=self.settings.analytics.default_period_days
         )
-        st.session_state.dashboard_state.date_range = date_range
         
         # Custodiantes
         custodians = self.filter_manager.create_custodian_filter()
-        st.session_state.dashboard_state.selected_custodians = custodians
         
         # Fundos
         funds = self.filter_manager.create_fund_filter()
-        st.session_state.dashboard_state.selected_funds = funds
         
-        # Botão de atualização
-        st.markdown("---")
-        if st.button("🔄 Atualizar Dados"):
-            st.cache_data.clear()
+        if st.button("Aplicar filtros", type="primary", use_container_width=True, key="apply_filters"):
+            state = st.session_state.dashboard_state
+            state.date_range = date_range
+            state.selected_custodians = custodians
+            state.selected_funds = funds
             st.rerun()
     
     def _get_current_filters(self) -> FilterParams:
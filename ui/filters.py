@@ -8,35 +8,35 @@ from utils.logging_utils import Log
 
 logger = Log.get_logger(__name__)
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _load_filter_options(_repository: DataRepository) -> Tuple[List[str], List[str]]:
+    """Carrega opções de filtro (metadados) compartilhadas entre sessões (erros propagam e não são cacheados)"""
+    funds, custodians = _repository.get_available_filter_options()
+    logger.info(f"Carregados {len(funds)} fundos e {len(custodians)} custodiantes disponíveis")
+    return funds, custodians
+
 class FilterManager:
+    # Limite de opções enviadas ao multiselect; a busca é o mecanismo de descoberta
+    MAX_FUND_OPTIONS = 200
+    
     def __init__(self, repository: DataRepository):
         self.repository = repository
     
+    def _get_filter_options(self) -> Tuple[List[str], List[str]]:
+        """Fundos e custodiantes disponíveis, carregados em uma única consulta"""
+        try:
+            return _load_filter_options(self.repository)
+        except Exception as e:
+            logger.error(f"Erro ao carregar opções de filtro: {str(e)}")
+            return [], []
+    
     def _get_available_funds(self) -> List[str]:
-        """Cache para fundos disponíveis com performance tracking"""
-        # Usar cache simples via functools para evitar problemas com Streamlit
-        if not hasattr(self, '_funds_cache'):
-            try:
-                funds = self.repository.get_available_funds()
-                logger.info(f"Carregados {len(funds)} fundos disponíveis")
-                self._funds_cache = funds
-            except Exception as e:
-                logger.error(f"Erro ao carregar fundos: {str(e)}")
-                self._funds_cache = []
-        return self._funds_cache
+        """Fundos disponíveis a partir do cache de opções de filtro"""
+        return self._get_filter_options()[0]
     
     def _get_available_custodians(self) -> List[str]:
-        """Cache para custodiantes disponíveis com performance tracking"""
-        # Usar cache simples via functools para evitar problemas com Streamlit
-        if not hasattr(self, '_custodians_cache'):
-            try:
-                custodians = self.repository.get_available_custodians()
-                logger.info(f"Carregados {len(custodians)} custodiantes disponíveis")
-                self._custodians_cache = custodians
-            except Exception as e:
-                logger.error(f"Erro ao carregar custodiantes: {str(e)}")
-                self._custodians_cache = []
-        return self._custodians_cache
+        """Custodiantes disponíveis a partir do cache de opções de filtro"""
+        return self._get_filter_options()[1]
     
     def create_date_filter(self, default_days: int = 45) -> Tuple[date, date]:
         """Cria filtro de período"""
@@ -135,6 +135,8 @@ class FilterManager:
         
         if clear_selection:
             st.session_state.selected_funds = []
+            # Limpar vale sem "Aplicar": KPIs deixam de usar os fundos anteriores
+            st.session_state.dashboard_state.selected_funds = []
             st.rerun()
         
         if select_all:
@@ -142,10 +144,22 @@ class FilterManager:
             # Atualizar session state
             st.session_state.selected_funds = selected_funds
         else:
+            display_funds = filtered_funds[:self.MAX_FUND_OPTIONS]
+            if len(filtered_funds) > self.MAX_FUND_OPTIONS:
+                st.caption(f"Mostrando {self.MAX_FUND_OPTIONS} de {len(filtered_funds)} — refine a busca")
+            
+            # Manter fundos já selecionados fora da janela visível (também limitados, ex.: após desmarcar "Todos")
+            previous = list(st.session_state.get('selected_funds', []))
+            if len(previous) > self.MAX_FUND_OPTIONS:
+                st.caption(f"Seleção anterior de {len(previous)} fundos reduzida a {self.MAX_FUND_OPTIONS} — use \"Todos\" para selecionar todos")
+                previous = previous[:self.MAX_FUND_OPTIONS]
+                st.session_state.selected_funds = previous
+            options = list(dict.fromkeys(previous + display_funds))
+            
             selected_funds = st.multiselect(
                 "Selecione fundos:",
-                options=filtered_funds,
-                default=st.session_state.get('selected_funds', []),
+                options=options,
+                default=previous,
                 key="selected_funds"
             )
         
@@ -4,106 +4,165 @@ Análise crítica de negócio para fundos de investimento
 """
 import streamlit as st
 import pandas as pd
-from typing import Dict, Any, List, Optional
+import numpy as np
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from config.settings import AnalyticsConfig
+from core.models import KPIResult
 from data.models import FilterParams
 from data.repository import DataRepository
 from utils.logging_utils import Log
 
 logger = Log.get_logger(__name__)
 
+# Regras de alerta: (chave do KPI, valor esperado ou predicado, mensagem)
+_ALERT_RULES = (
+    ('liquidity_risk_level', 'Alto', "🚨 **Risco de Liquidez Alto** - Saldos críticos detectados"),
+    ('concentration_risk_level', 'Alto', "⚠️ **Alta Concentração** - Risco concentrado em poucos fundos"),
+    ('data_quality_score', lambda value: value < 70, "📋 **Qualidade de Dados Baixa** - Verificar inconsistências"),
+    ('operational_health', 'Baixa', "⚡ **Baixa Atividade Operacional** - Poucas operações no período"),
+)
+
+@st.cache_data(persist="disk", max_entries=256, show_spinner=False,
+               hash_funcs={FilterParams: FilterParams.cache_key})
+def _compute_kpis(_manager: "KPIManager", filters: FilterParams, ttl_window: int) -> KPIResult:
+    """KPIs em cache persistido em disco (aquece novas sessões e reinícios do app)
+    
+    Só resultados calculados com sucesso chegam ao disco: falhas de consulta propagam
+    (get_kpi_aggregates/execute_query_df não devolvem DataFrame vazio em erro) e o
+    fallback para KPIs vazios acontece fora do cache, em calculate_financial_kpis.
+    """
+    return _manager._compute_financial_kpis(filters)
+
+def _liquidity_kernel(mins: np.ndarray, means: np.ndarray) -> Tuple[float, int, float, float]:
+    """Retorna (ratio de liquidez, fundos críticos, menor saldo, saldo médio) sobre arrays por fundo"""
+    mean_sum = means.sum()
+    ratio = float(mins.sum() / mean_sum) if mean_sum > 0 else 0.0
+    critical = int(np.count_nonzero(mins < means * 0.1))
+    return ratio, critical, float(np.nanmin(mins)), float(np.nanmean(means))
+
+def _concentration_kernel(volumes: np.ndarray) -> Tuple[float, float, float]:
+    """Retorna (índice Herfindahl, % do maior fundo, % dos 3 maiores) sobre volumes por fundo"""
+    pct = volumes / volumes.sum() * 100.0
+    hhi = float(np.dot(pct, pct)) / 100.0
+    # Seleção parcial O(N) dos 3 maiores, sem ordenar o vetor inteiro
+    k = min(3, pct.size)
+    top_3 = float(np.partition(pct, -k)[-k:].sum())
+    return hhi, float(pct.max()), top_3
+
 class KPIManager:
     """Gerenciador de KPIs financeiros críticos"""
     
+    # Campos verificados em campos_nulos por QueryBuilder.build_kpi_aggregates_query
+    NULLABLE_FIELDS = 6
+    
     def __init__(self, repository: DataRepository):
         self.repository = repository
     
-    def calculate_financial_kpis(self, filters: FilterParams) -> Dict[str, Any]:
+    def clear_cache(self):
+        """Invalida KPIs e dados de extrato em cache sem afetar caches de metadados"""
+        _compute_kpis.clear()
+        self.repository.clear_cache()
+        logger.info("Cache de KPIs invalidado")
+    
+    def calculate_financial_kpis(self, filters: FilterParams) -> KPIResult:
         """Calcula KPIs financeiros essenciais"""
-        # Cache simples usando session_state
-        import streamlit as st
-        cache_key = f"kpis_{filters.start_date}_{filters.end_date}_{hash(str(filters.funds))}"
-        
-        if cache_key in st.session_state:
-            return st.session_state[cache_key]
-        
         try:
-            # Query principal para dados do período
-            query_data = self.repository.get_extract_data(filters)
-            
-            if query_data.empty:
-                return self._empty_kpis()
-            
-            # KPIs básicos
-            total_entries = query_data['entrada'].sum() if 'entrada' in query_data else 0
-            total_exits = query_data['saida'].sum() if 'saida' in query_data else 0
-            net_flow = total_entries - total_exits
-            
-            # Análise de liquidez
-            liquidity_metrics = self._calculate_liquidity_metrics(query_data)
-            
-            # Análise de concentração
-            concentration_metrics = self._calculate_concentration_metrics(query_data)
-            
-            # Análise de performance
-            performance_metrics = self._calculate_performance_metrics(query_data, filters)
-            
-            kpis = {
-                # KPIs Principais
-                'total_volume': abs(total_entries) + abs(total_exits),
-                'net_flow': net_flow,
-                'total_entries': total_entries,
-                'total_exits': total_exits,
-                'operation_count': len(query_data),
-                'active_funds': query_data['nmfundo'].nunique() if 'nmfundo' in query_data else 0,
-                
-                # Métricas de liquidez
-                **liquidity_metrics,
-                
-                # Métricas de concentração
-                **concentration_metrics,
-                
-                # Métricas de performance
-                **performance_metrics,
-                
-                # Metadados
-                'last_update': datetime.now(),
-                'period_days': (filters.end_date - filters.start_date).days,
-                'data_quality_score': self._calculate_data_quality_score(query_data)
-            }
-            
-            logger.info(f"KPIs calculados: {len(kpis)} métricas para {len(query_data)} registros")
-            
-            # Cache o resultado
-            st.session_state[cache_key] = kpis
-            return kpis
-            
+            # Streamlit ignora ttl em caches persistentes: a janela de TTL entra na chave
+            ttl_window = int(time.time() // AnalyticsConfig.cache_ttl)
+            return _compute_kpis(self, filters, ttl_window)
         except Exception as e:
             logger.error(f"Erro ao calcular KPIs: {str(e)}")
             return self._empty_kpis()
     
-    def _calculate_liquidity_metrics(self, data: pd.DataFrame) -> Dict[str, float]:
-        """Calcula métricas críticas de liquidez"""
+    def _compute_financial_kpis(self, filters: FilterParams) -> KPIResult:
+        """Executa o cálculo dos KPIs (erros propagam para não serem cacheados)"""
+        now = datetime.now()
+        period_days = (filters.end_date - filters.start_date).days
+        
+        # Agregados por fundo/dia calculados no banco (sem carregar lançamentos)
+        kpi_data = self.repository.get_kpi_aggregates(filters)
+        
+        if kpi_data.empty:
+            return self._empty_kpis()
+        
+        # Consolidações por fundo e por dia sobre o resultado já agregado
+        fund_agg = kpi_data.groupby('nmfundo', sort=False).agg(
+            entrada=('entrada', 'sum'),
+            saida=('saida', 'sum'),
+            saldo_min=('saldo_min', 'min'),
+            saldo_max=('saldo_max', 'max'),
+            saldo_sum=('saldo_sum', 'sum'),
+            operacoes=('operacoes', 'sum')
+        )
+        fund_agg['saldo_mean'] = fund_agg['saldo_sum'] / fund_agg['operacoes']
+        daily_agg = kpi_data.groupby('date', sort=False).agg(
+            entrada=('entrada', 'sum'),
+            saida=('saida', 'sum'),
+            operacoes=('operacoes', 'sum')
+        )
+        
+        # KPIs básicos (uma única redução sobre entrada/saída)
+        flows = daily_agg[['entrada', 'saida']].to_numpy(dtype=np.float64, copy=False)
+        total_entries, total_exits = flows.sum(axis=0)
+        net_flow = total_entries - total_exits
+        operation_count = int(daily_agg['operacoes'].sum())
+        
+        # Análise de liquidez
+        liquidity_metrics = self._calculate_liquidity_metrics(fund_agg)
+        
+        # Análise de concentração
+        concentration_metrics = self._calculate_concentration_metrics(fund_agg)
+        
+        # Análise de performance
+        performance_metrics = self._calculate_performance_metrics(fund_agg, daily_agg, period_days)
+        
+        kpis = KPIResult(**{
+            # KPIs Principais
+            'total_volume': abs(total_entries) + abs(total_exits),
+            'net_flow': net_flow,
+            'total_entries': total_entries,
+            'total_exits': total_exits,
+            'operation_count': operation_count,
+            'active_funds': len(fund_agg),
+            
+            # Métricas de liquidez
+            **liquidity_metrics,
+            
+            # Métricas de concentração
+            **concentration_metrics,
+            
+            # Métricas de performance
+            **performance_metrics,
+            
+            # Metadados
+            'last_update': now,
+            'period_days': period_days,
+            'data_quality_score': self._calculate_data_quality_score(kpi_data)
+        })
+        
+        logger.info(f"KPIs calculados: {len(KPIResult.__slots__)} métricas para {operation_count} registros")
+        return kpis
+    
+    def _calculate_liquidity_metrics(self, fund_agg: pd.DataFrame) -> Dict[str, float]:
+        """Calcula métricas críticas de liquidez a partir dos saldos agregados por fundo"""
         try:
-            if data.empty or 'saldo' not in data:
+            if fund_agg.empty:
                 return {'liquidity_ratio': 0, 'min_balance': 0, 'avg_balance': 0}
             
-            # Saldos por fundo
-            balance_data = data.groupby('nmfundo')['saldo'].agg(['min', 'max', 'mean']).reset_index()
-            
-            # Ratio de liquidez (saldo mínimo / médio)
-            liquidity_ratio = (balance_data['min'].sum() / balance_data['mean'].sum()) if balance_data['mean'].sum() > 0 else 0
-            
-            # Fundos com saldo crítico (< 10% do saldo médio)
-            critical_funds = len(balance_data[balance_data['min'] < (balance_data['mean'] * 0.1)])
+            # Ratio de liquidez (saldo mínimo / médio) e fundos com saldo crítico (< 10% do médio)
+            liquidity_ratio, critical_funds, min_balance, avg_balance = _liquidity_kernel(
+                fund_agg['saldo_min'].to_numpy(), fund_agg['saldo_mean'].to_numpy()
+            )
             
             return {
                 'liquidity_ratio': round(liquidity_ratio, 4),
-                'min_balance': balance_data['min'].min(),
-                'avg_balance': balance_data['mean'].mean(),
+                'min_balance': min_balance,
+                'avg_balance': avg_balance,
                 'critical_funds_count': critical_funds,
                 'liquidity_risk_level': 'Alto' if liquidity_ratio < 0.5 else 'Médio' if liquidity_ratio < 0.8 else 'Baixo'
             }
@@ -112,33 +171,21 @@ class KPIManager:
             logger.error(f"Erro ao calcular métricas de liquidez: {str(e)}")
             return {'liquidity_ratio': 0, 'liquidity_risk_level': 'Desconhecido'}
     
-    def _calculate_concentration_metrics(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Calcula métricas de concentração de risco"""
+    def _calculate_concentration_metrics(self, fund_agg: pd.DataFrame) -> Dict[str, Any]:
+        """Calcula métricas de concentração de risco a partir do volume agregado por fundo"""
         try:
-            if data.empty or 'nmfundo' not in data:
+            if fund_agg.empty:
                 return {'concentration_index': 0, 'top_fund_percentage': 0}
             
-            # Volume por fundo
-            fund_volumes = data.groupby('nmfundo').agg({
-                'entrada': 'sum',
-                'saida': 'sum'
-            }).reset_index()
-            
-            fund_volumes['total_volume'] = fund_volumes['entrada'].abs() + fund_volumes['saida'].abs()
-            total_volume = fund_volumes['total_volume'].sum()
+            # Volume por fundo (direto nos ndarrays, sem Series intermediárias)
+            volumes = np.abs(fund_agg['entrada'].to_numpy()) + np.abs(fund_agg['saida'].to_numpy())
+            total_volume = volumes.sum()
             
             if total_volume == 0:
                 return {'concentration_index': 0, 'top_fund_percentage': 0}
             
-            # Percentual do maior fundo
-            fund_volumes['percentage'] = (fund_volumes['total_volume'] / total_volume * 100)
-            top_fund_pct = fund_volumes['percentage'].max()
-            
-            # Índice de concentração Herfindahl
-            concentration_index = (fund_volumes['percentage'] ** 2).sum() / 100
-            
-            # Top 3 fundos
-            top_3_pct = fund_volumes.nlargest(3, 'percentage')['percentage'].sum()
+            # Índice Herfindahl, percentual do maior fundo e dos 3 maiores
+            concentration_index, top_fund_pct, top_3_pct = _concentration_kernel(volumes)
             
             return {
                 'concentration_index': round(concentration_index, 2),
@@ -151,32 +198,24 @@ class KPIManager:
             logger.error(f"Erro ao calcular concentração: {str(e)}")
             return {'concentration_index': 0, 'concentration_risk_level': 'Desconhecido'}
     
-    def _calculate_performance_metrics(self, data: pd.DataFrame, filters: FilterParams) -> Dict[str, Any]:
-        """Calcula métricas de performance operacional"""
+    def _calculate_performance_metrics(self, fund_agg: pd.DataFrame, daily_agg: pd.DataFrame,
+                                       period_days: int) -> Dict[str, Any]:
+        """Calcula métricas de performance operacional a partir dos fluxos diários agregados"""
         try:
-            if data.empty:
+            if daily_agg.empty:
                 return {'daily_avg_operations': 0, 'operational_efficiency': 0}
             
-            period_days = max((filters.end_date - filters.start_date).days, 1)
-            
             # Operações por dia
-            daily_avg_operations = len(data) / period_days
+            daily_avg_operations = daily_agg['operacoes'].sum() / max(period_days, 1)
             
             # Eficiência operacional (ratio entrada/saída)
-            total_entries = data['entrada'].sum() if 'entrada' in data else 0
-            total_exits = data['saida'].sum() if 'saida' in data else 0
+            total_entries = daily_agg['entrada'].sum()
+            total_exits = daily_agg['saida'].sum()
             operational_efficiency = abs(total_entries / total_exits) if total_exits != 0 else 0
             
             # Volatilidade de fluxo
-            if 'dt_lancamento' in data:
-                daily_flows = data.groupby(data['dt_lancamento'].dt.date).agg({
-                    'entrada': 'sum',
-                    'saida': 'sum'
-                }).reset_index()
-                daily_flows['net_flow'] = daily_flows['entrada'] - daily_flows['saida']
-                flow_volatility = daily_flows['net_flow'].std() if len(daily_flows) > 1 else 0
-            else:
-                flow_volatility = 0
+            net_flow = daily_agg['entrada'].to_numpy(copy=False) - daily_agg['saida'].to_numpy(copy=False)
+            flow_volatility = float(np.nanstd(net_flow, ddof=1)) if net_flow.size > 1 else 0.0
             
             return {
                 'daily_avg_operations': round(daily_avg_operations, 2),
@@ -189,28 +228,28 @@ class KPIManager:
             logger.error(f"Erro ao calcular performance: {str(e)}")
             return {'daily_avg_operations': 0, 'operational_health': 'Desconhecida'}
     
-    def _calculate_data_quality_score(self, data: pd.DataFrame) -> float:
-        """Calcula score de qualidade dos dados"""
+    def _calculate_data_quality_score(self, kpi_data: pd.DataFrame) -> float:
+        """Calcula score de qualidade dos dados a partir das contagens agregadas no banco"""
         try:
-            if data.empty:
+            if kpi_data.empty:
                 return 0.0
             
             quality_score = 100.0
+            total_rows = kpi_data['operacoes'].sum()
             
-            # Penalizações por problemas de qualidade
-            if data.isnull().sum().sum() > 0:
-                null_percentage = (data.isnull().sum().sum() / data.size) * 100
+            # Penalizações por problemas de qualidade (campos da view verificados na query)
+            null_count = kpi_data['campos_nulos'].sum()
+            if null_count > 0:
+                null_percentage = (null_count / (total_rows * self.NULLABLE_FIELDS)) * 100
                 quality_score -= null_percentage * 2
             
             # Verificar consistência de saldos
-            if 'saldo' in data and (data['saldo'] < 0).sum() > len(data) * 0.1:
+            if kpi_data['saldos_negativos'].sum() > total_rows * 0.1:
                 quality_score -= 10  # Muitos saldos negativos
             
             # Verificar datas futuras
-            if 'dt_lancamento' in data:
-                future_dates = (data['dt_lancamento'] > datetime.now()).sum()
-                if future_dates > 0:
-                    quality_score -= 20
+            if kpi_data['datas_futuras'].sum() > 0:
+                quality_score -= 20
             
             return max(0.0, min(100.0, quality_score))
             
@@ -218,26 +257,11 @@ class KPIManager:
             logger.error(f"Erro ao calcular qualidade dos dados: {str(e)}")
             return 50.0  # Score neutro em caso de erro
     
-    def _empty_kpis(self) -> Dict[str, Any]:
+    def _empty_kpis(self) -> KPIResult:
         """Retorna KPIs vazios para casos de erro"""
-        return {
-            'total_volume': 0,
-            'net_flow': 0,
-            'total_entries': 0,
-            'total_exits': 0,
-            'operation_count': 0,
-            'active_funds': 0,
-            'liquidity_ratio': 0,
-            'concentration_index': 0,
-            'daily_avg_operations': 0,
-            'data_quality_score': 0,
-            'last_update': datetime.now(),
-            'liquidity_risk_level': 'Desconhecido',
-            'concentration_risk_level': 'Desconhecido',
-            'operational_health': 'Desconhecida'
-        }
+        return KPIResult(last_update=datetime.now())
     
-    def render_kpi_dashboard(self, kpis: Dict[str, Any]):
+    def render_kpi_dashboard(self, kpis: KPIResult):
         """Renderiza dashboard de KPIs"""
         st.markdown("### 📊 **Indicadores Financeiros em Tempo Real**")
         
@@ -247,32 +271,32 @@ class KPIManager:
         with col1:
             st.metric(
                 label="💰 Volume Total",
-                value=f"R$ {kpis['total_volume']:,.0f}",
-                delta=f"R$ {kpis['net_flow']:,.0f}" if kpis['net_flow'] != 0 else None
+                value=f"R$ {kpis.total_volume:,.0f}",
+                delta=f"R$ {kpis.net_flow:,.0f}" if kpis.net_flow != 0 else None
             )
         
         with col2:
             st.metric(
                 label="🔄 Operações",
-                value=f"{kpis['operation_count']:,}",
-                delta=f"{kpis['daily_avg_operations']:.1f}/dia"
+                value=f"{kpis.operation_count:,}",
+                delta=f"{kpis.daily_avg_operations:.1f}/dia"
             )
         
         with col3:
-            liquidity_color = "normal" if kpis.get('liquidity_risk_level') == 'Baixo' else "inverse"
+            liquidity_color = "normal" if kpis.liquidity_risk_level == 'Baixo' else "inverse"
             st.metric(
                 label="💧 Liquidez",
-                value=f"{kpis['liquidity_ratio']:.2%}",
-                delta=kpis.get('liquidity_risk_level', 'N/A'),
+                value=f"{kpis.liquidity_ratio:.2%}",
+                delta=kpis.liquidity_risk_level,
                 delta_color=liquidity_color
             )
         
         with col4:
-            concentration_color = "inverse" if kpis.get('concentration_risk_level') == 'Alto' else "normal"
+            concentration_color = "inverse" if kpis.concentration_risk_level == 'Alto' else "normal"
             st.metric(
                 label="🎯 Concentração",
-                value=f"{kpis['concentration_index']:.1f}%",
-                delta=kpis.get('concentration_risk_level', 'N/A'),
+                value=f"{kpis.concentration_index:.1f}%",
+                delta=kpis.concentration_risk_level,
                 delta_color=concentration_color
             )
         
@@ -282,54 +306,41 @@ class KPIManager:
         with col1:
             st.metric(
                 label="📈 Fundos Ativos",
-                value=kpis['active_funds'],
-                delta=f"{kpis.get('critical_funds_count', 0)} críticos" if kpis.get('critical_funds_count') else None
+                value=kpis.active_funds,
+                delta=f"{kpis.critical_funds_count} críticos" if kpis.critical_funds_count else None
             )
         
         with col2:
             st.metric(
                 label="⚡ Eficiência",
-                value=f"{kpis.get('operational_efficiency', 0):.2f}",
-                delta=kpis.get('operational_health', 'N/A')
+                value=f"{kpis.operational_efficiency:.2f}",
+                delta=kpis.operational_health
             )
         
         with col3:
-            quality_color = "normal" if kpis['data_quality_score'] > 80 else "inverse"
+            quality_color = "normal" if kpis.data_quality_score > 80 else "inverse"
             st.metric(
                 label="📋 Qualidade",
-                value=f"{kpis['data_quality_score']:.0f}%",
+                value=f"{kpis.data_quality_score:.0f}%",
                 delta_color=quality_color
             )
         
         with col4:
             st.metric(
                 label="📅 Período",
-                value=f"{kpis.get('period_days', 0)} dias",
-                delta=kpis['last_update'].strftime('%H:%M')
+                value=f"{kpis.period_days} dias",
+                delta=kpis.last_update.strftime('%H:%M')
             )
         
         # Alertas críticos
         self._render_critical_alerts(kpis)
     
-    def _render_critical_alerts(self, kpis: Dict[str, Any]):
+    def _render_critical_alerts(self, kpis: KPIResult):
         """Renderiza alertas críticos baseados nos KPIs"""
-        alerts = []
-        
-        # Alertas de liquidez
-        if kpis.get('liquidity_risk_level') == 'Alto':
-            alerts.append("🚨 **Risco de Liquidez Alto** - Saldos críticos detectados")
-        
-        # Alertas de concentração
-        if kpis.get('concentration_risk_level') == 'Alto':
-            alerts.append("⚠️ **Alta Concentração** - Risco concentrado em poucos fundos")
-        
-        # Alertas de qualidade
-        if kpis['data_quality_score'] < 70:
-            alerts.append("📋 **Qualidade de Dados Baixa** - Verificar inconsistências")
-        
-        # Alertas operacionais
-        if kpis.get('operational_health') == 'Baixa':
-            alerts.append("⚡ **Baixa Atividade Operacional** - Poucas operações no período")
+        alerts = [
+            message for key, condition, message in _ALERT_RULES
+            if (condition(getattr(kpis, key)) if callable(condition) else getattr(kpis, key) == condition)
+        ]
         
         if alerts:
             st.markdown("### 🚨 Alertas Críticos")
@@ -9,6 +9,11 @@ from config.settings import AppSettings
 from .components import UIComponents
 from .charts import ChartManager
 
+@st.cache_data(ttl=5, show_spinner=False)
+def _check_connection(_repository: DataRepository) -> bool:
+    """Health check do banco limitado a uma consulta a cada 5 segundos"""
+    return _repository.is_connected()
+
 class ExtratoPage:
     def __init__(self, repository: DataRepository, chart_manager: ChartManager, settings: AppSettings):
         self.repository = repository
@@ -26,40 +31,50 @@ class ExtratoPage:
             st.warning("Nenhum dado encontrado para os filtros selecionados.")
             return
         
-        # Métricas principais
-        self._render_extract_metrics(df)
+        # Métricas principais (a partir do consolidado em cache, não do extrato bruto)
+        self._render_extract_metrics(self.repository.get_extract_rollup(filters))
         
         # Tabela de dados
-        UIComponents.render_data_table(df, "Detalhes do Extrato")
+        UIComponents.render_data_table(
+            df, "Detalhes do Extrato",
+            preview_limit=self.settings.ui.preview_limit
+        )
         
         # Gráficos
         self._render_extract_charts(df)
     
-    def _render_extract_metrics(self, df: pd.DataFrame):
-        """Renderiza métricas do extrato"""
-        creditos = df[df['tipo_lancamento'] == 'Crédito']['valor'].sum()
-        debitos = abs(df[df['tipo_lancamento'] == 'Débito']['valor'].sum())
-        saldo_final = df['valor'].sum()
+    def _render_extract_metrics(self, rollup: pd.DataFrame):
+        """Renderiza métricas do extrato a partir do consolidado por fundo/dia/tipo"""
+        # Uma única agregação por tipo em vez de uma máscara por métrica
+        by_type = (
+            rollup.groupby('tipo_lancamento', observed=True)
+            .agg(soma=('sum', 'sum'), qtd=('count', 'sum'))
+            .reindex(['Crédito', 'Débito'], fill_value=0)
+        )
+        
+        creditos = by_type.at['Crédito', 'soma']
+        debitos = abs(by_type.at['Débito', 'soma'])
+        saldo_final = rollup['sum'].sum()
         
         metrics = [
             {
                 'title': 'Créditos',
                 'value': UIComponents.format_currency(creditos),
-                'change': f"{len(df[df['tipo_lancamento'] == 'Crédito'])} operações",
+                'change': f"{int(by_type.at['Crédito', 'qtd'])} operações",
                 'change_type': 'positive',
                 'icon': '💰'
             },
             {
                 'title': 'Débitos', 
                 'value': UIComponents.format_currency(debitos),
-                'change': f"{len(df[df['tipo_lancamento'] == 'Débito'])} operações",
+                'change': f"{int(by_type.at['Débito', 'qtd'])} operações",
                 'change_type': 'negative',
                 'icon': '💸'
             },
             {
                 'title': 'Saldo Final',
                 'value': UIComponents.format_currency(saldo_final),
-                'change': f"{len(df)} operações totais",
+                'change': f"{int(rollup['count'].sum())} operações totais",
                 'change_type': 'positive' if saldo_final >= 0 else 'negative',
                 'icon': '💼'
             }
@@ -91,8 +106,13 @@ class AnalysisPage:
         self.chart_manager = chart_manager
         self.settings = settings
     
+    @st.fragment
     def render(self, filters: FilterParams):
-        """Renderiza página de análises"""
+        """Renderiza página de análises
+        
+        Executa como fragment: trocar o tipo de análise reexecuta apenas esta
+        página, sem recalcular KPIs nem redesenhar os gráficos de extrato.
+        """
         UIComponents.render_section_title("📈 Análises Avançadas")
         
         # Seletor de tipo de análise
@@ -204,7 +224,7 @@ class MonitoringPage:
         # Status do sistema
         st.subheader("Status da Conexão")
         
-        if self.repository.is_connected():
+        if _check_connection(self.repository):
             st.success("✅ Banco de dados conectado")
         else:
             st.error("❌ Banco de dados desconectado")
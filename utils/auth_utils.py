@@ -3,10 +3,14 @@ Sistema de autenticação básica e segura para dashboard
 Compatível com Streamlit Cloud deployment
 """
 import streamlit as st
+import os
+import base64
 import hashlib
 import secrets
 import time
-from typing import Optional, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import bcrypt
 
@@ -14,18 +18,82 @@ from .logging_utils import Log
 
 logger = Log.get_logger(__name__)
 
+# Custo bcrypt padrão (2^rounds iterações) dos hashes gerados localmente
+_BCRYPT_ROUNDS = int(os.getenv('AUTH_BCRYPT_COST', 10))
+
+# Prefixo dos hashes com pré-hash SHA-256 (hashes bcrypt puros continuam aceitos)
+_PREHASH_PREFIX = 'bcrypt-sha256$'
+
+def _prehash(password: str) -> bytes:
+    """SHA-256 em base64 da senha (evita o corte silencioso do bcrypt em 72 bytes)"""
+    return base64.b64encode(hashlib.sha256(password.encode('utf-8')).digest())
+
+def _bcrypt_sha256_hash(password: str, rounds: int = _BCRYPT_ROUNDS) -> str:
+    """Hash bcrypt sobre o pré-hash SHA-256 da senha"""
+    return _PREHASH_PREFIX + bcrypt.hashpw(_prehash(password), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _hash_scheme(hashed: str) -> Optional[Tuple[bool, int]]:
+    """(usa pré-hash, custo) de um hash armazenado, ex.: '$2b$12$...' -> (False, 12)"""
+    prehashed = hashed.startswith(_PREHASH_PREFIX)
+    parts = hashed[len(_PREHASH_PREFIX):].split('$') if prehashed else hashed.split('$')
+    try:
+        return prehashed, int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+def benchmark_bcrypt_cost(budget_ms: float = 250.0, min_cost: int = 10, max_cost: int = 14) -> int:
+    """Maior custo bcrypt cuja verificação cabe no orçamento de tempo (em ms)"""
+    best = min_cost
+    for cost in range(min_cost, max_cost + 1):
+        hashed = bcrypt.hashpw(b'benchmark', bcrypt.gensalt(rounds=cost))
+        start = time.perf_counter()
+        bcrypt.checkpw(b'benchmark', hashed)
+        if (time.perf_counter() - start) * 1000 > budget_ms:
+            break
+        best = cost
+    return best
+
+# Baldes de rate limit por usuário, compartilhados entre sessões: usuário -> (tokens, último acesso)
+_BUCKETS: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+_BUCKETS_LOCK = threading.Lock()
+_MAX_BUCKETS = 10000
+
+# Credenciais demo (produção: usar st.secrets ou banco de dados)
+_DEMO_USERS = {
+    "admin": {
+        "password": _bcrypt_sha256_hash("admin123"),
+        "role": "admin",
+        "name": "Administrador",
+        "permissions": ["read", "write", "admin"]
+    },
+    "gestor": {
+        "password": _bcrypt_sha256_hash("gestor123"),
+        "role": "manager",
+        "name": "Gestor",
+        "permissions": ["read", "write"]
+    },
+    "analista": {
+        "password": _bcrypt_sha256_hash("analista123"),
+        "role": "analyst",
+        "name": "Analista",
+        "permissions": ["read"]
+    }
+}
+
 class SimpleAuthenticator:
     """Autenticador simples e seguro para dashboard"""
     
-    def __init__(self):
+    # Hashes de referência para usuários inexistentes, por (usa pré-hash, custo) dos hashes armazenados
+    _DUMMY_HASHES: Dict[Tuple[bool, int], str] = {}
+    _DUMMY_LOCK = threading.Lock()
+    
+    def __init__(self, cost: Optional[int] = None):
+        self._cost = cost if cost is not None else _BCRYPT_ROUNDS
         self.max_attempts = 5
         self.lockout_time = 900  # 15 minutos
-        self._init_session_state()
     
     def _init_session_state(self):
         """Inicializa estado de sessão para autenticação"""
-        if 'auth_attempts' not in st.session_state:
-            st.session_state.auth_attempts = {}
         if 'authenticated' not in st.session_state:
             st.session_state.authenticated = False
         if 'user_data' not in st.session_state:
@@ -35,11 +103,15 @@ class SimpleAuthenticator:
     
     def _hash_password(self, password: str) -> str:
         """Cria hash seguro da senha"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        return _bcrypt_sha256_hash(password, self._cost)
     
     def _check_password(self, password: str, hashed: str) -> bool:
         """Verifica senha contra hash"""
         try:
+            if hashed.startswith(_PREHASH_PREFIX):
+                return bcrypt.checkpw(_prehash(password), hashed[len(_PREHASH_PREFIX):].encode('utf-8'))
+            
+            # Compatibilidade com hashes bcrypt puros (ex.: st.secrets existentes)
             return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
         except Exception as e:
             logger.error(f"Erro ao verificar senha: {str(e)}")
@@ -55,111 +127,114 @@ class SimpleAuthenticator:
         except:
             pass
         
-        # Fallback para credenciais demo
-        demo_users = {
-            "admin": {
-                "password": self._hash_password("admin123"),
-                "role": "admin",
-                "name": "Administrador",
-                "permissions": ["read", "write", "admin"]
-            },
-            "gestor": {
-                "password": self._hash_password("gestor123"),
-                "role": "manager",
-                "name": "Gestor",
-                "permissions": ["read", "write"]
-            },
-            "analista": {
-                "password": self._hash_password("analista123"),
-                "role": "analyst",
-                "name": "Analista",
-                "permissions": ["read"]
-            }
-        }
-        
+        # Fallback para credenciais demo (hashes calculados uma vez no import)
         logger.warning("Usando credenciais demo - não usar em produção!")
-        return demo_users
+        return _DEMO_USERS
+    
+    def _dummy_hash(self, users: Dict[str, Dict[str, str]]) -> str:
+        """Hash fictício com o mesmo esquema e custo do hash armazenado mais caro (tempo independe do usuário)"""
+        schemes = [_hash_scheme(str(data.get('password', ''))) for data in users.values()]
+        scheme = max((s for s in schemes if s), key=lambda s: s[1], default=(True, self._cost))
+        
+        with SimpleAuthenticator._DUMMY_LOCK:
+            dummy = SimpleAuthenticator._DUMMY_HASHES.get(scheme)
+            if dummy is None:
+                prehashed, cost = scheme
+                password = secrets.token_hex(16)
+                if prehashed:
+                    dummy = _bcrypt_sha256_hash(password, cost)
+                else:
+                    dummy = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=cost)).decode('utf-8')
+                SimpleAuthenticator._DUMMY_HASHES[scheme] = dummy
+        return dummy
+    
+    def _refill(self, username: str, now: float) -> float:
+        """Tokens disponíveis do usuário, reabastecidos sob demanda (chamar com _BUCKETS_LOCK)"""
+        bucket = _BUCKETS.get(username)
+        if bucket is None:
+            return float(self.max_attempts)
+        
+        tokens, last_ts = bucket
+        return min(float(self.max_attempts), tokens + (now - last_ts) * self.max_attempts / self.lockout_time)
     
     def _check_rate_limit(self, username: str) -> bool:
-        """Verifica rate limiting por usuário"""
-        now = time.time()
+        """Verifica rate limiting por usuário (compartilhado entre sessões)"""
+        with _BUCKETS_LOCK:
+            tokens = self._refill(username, time.time())
         
-        if username in st.session_state.auth_attempts:
-            attempts_data = st.session_state.auth_attempts[username]
-            
-            # Reset attempts se passou tempo de lockout
-            if now - attempts_data.get('last_attempt', 0) > self.lockout_time:
-                st.session_state.auth_attempts[username] = {'count': 0, 'last_attempt': now}
-                return True
-            
-            # Verificar se excedeu tentativas
-            if attempts_data.get('count', 0) >= self.max_attempts:
-                remaining_time = self.lockout_time - (now - attempts_data.get('last_attempt', 0))
-                if remaining_time > 0:
-                    logger.warning(f"Rate limit atingido para {username}: {remaining_time:.0f}s restantes")
-                    return False
+        if tokens < 1:
+            logger.warning(f"Rate limit atingido para {username}: {self._remaining_lockout(username):.0f}s restantes")
+            return False
         
         return True
     
+    def _remaining_lockout(self, username: str) -> float:
+        """Segundos até o usuário recuperar uma tentativa"""
+        with _BUCKETS_LOCK:
+            tokens = self._refill(username, time.time())
+        return max(0.0, (1 - tokens) * self.lockout_time / self.max_attempts)
+    
     def _record_attempt(self, username: str, success: bool):
         """Registra tentativa de login"""
         now = time.time()
         
-        if username not in st.session_state.auth_attempts:
-            st.session_state.auth_attempts[username] = {'count': 0, 'last_attempt': now}
+        with _BUCKETS_LOCK:
+            if success:
+                # Reset do balde em sucesso
+                _BUCKETS.pop(username, None)
+            else:
+                # Consumir uma tentativa do balde
+                tokens = self._refill(username, now) - 1
+                _BUCKETS[username] = (tokens, now)
+                _BUCKETS.move_to_end(username)
+                while len(_BUCKETS) > _MAX_BUCKETS:
+                    _BUCKETS.popitem(last=False)
         
         if success:
-            # Reset counter em sucesso
-            st.session_state.auth_attempts[username] = {'count': 0, 'last_attempt': now}
             logger.info(f"Login bem-sucedido: {username}")
         else:
-            # Incrementar contador de falhas
-            st.session_state.auth_attempts[username]['count'] += 1
-            st.session_state.auth_attempts[username]['last_attempt'] = now
-            logger.warning(f"Login falhou para {username}: tentativa {st.session_state.auth_attempts[username]['count']}")
+            logger.warning(f"Login falhou para {username}: {max(tokens, 0):.1f} tentativas restantes")
     
     def authenticate(self, username: str, password: str) -> bool:
         """Autentica usuário com rate limiting"""
         if not username or not password:
             return False
         
+        self._init_session_state()
+        
         # Verificar rate limiting
         if not self._check_rate_limit(username):
-            attempts_data = st.session_state.auth_attempts.get(username, {})
-            remaining_time = self.lockout_time - (time.time() - attempts_data.get('last_attempt', 0))
+            remaining_time = self._remaining_lockout(username)
             st.error(f"⏳ Muitas tentativas falharam. Tente novamente em {remaining_time/60:.1f} minutos")
             return False
         
         # Carregar credenciais
         users = self._get_user_credentials()
+        user_data = users.get(username)
         
-        if username in users:
-            user_data = users[username]
-            
-            # Verificar senha
-            if self._check_password(password, user_data['password']):
-                # Login bem-sucedido
-                self._record_attempt(username, True)
-                
-                # Definir dados de sessão
-                st.session_state.authenticated = True
-                st.session_state.user_data = {
-                    'username': username,
-                    'role': user_data.get('role', 'user'),
-                    'name': user_data.get('name', username.title()),
-                    'permissions': user_data.get('permissions', ['read']),
-                    'login_time': datetime.now()
-                }
-                st.session_state.session_start = time.time()
-                
-                logger.info(f"Login realizado: {username} ({user_data.get('role', 'user')})")
-                return True
-            else:
-                self._record_attempt(username, False)
-        else:
+        # Verificar senha sempre (hash fictício para usuário inexistente)
+        stored_hash = user_data['password'] if user_data else self._dummy_hash(users)
+        password_ok = self._check_password(password, stored_hash)
+        if user_data is None or not password_ok:
             self._record_attempt(username, False)
+            return False
         
-        return False
+        # Login bem-sucedido
+        self._record_attempt(username, True)
+        
+        # Definir dados de sessão
+        st.session_state.authenticated = True
+        st.session_state.user_data = {
+            'username': username,
+            'role': user_data.get('role', 'user'),
+            'name': user_data.get('name', username.title()),
+            'permissions': frozenset(user_data.get('permissions', ['read'])),
+            'login_time': datetime.now()
+        }
+        st.session_state.session_start = time.time()
+        
+        logger.info(f"Login realizado: {username} ({user_data.get('role', 'user')})")
+        return True
     
     def logout(self):
         """Realiza logout do usuário"""
@@ -186,7 +261,8 @@ class SimpleAuthenticator:
         if not user_data:
             return False
         
-        permissions = user_data.get('permissions', [])
+        # frozenset montado no login: busca por hash, sem varrer a lista
+        permissions = user_data.get('permissions', frozenset())
         return permission in permissions
     
     def check_session_timeout(self, timeout_minutes: int = 60):
@@ -205,6 +281,8 @@ class SimpleAuthenticator:
     
     def render_login_form(self) -> bool:
         """Renderiza formulário de login"""
+        self._init_session_state()
+        
         st.markdown("""
         <div style='background: white; padding: 2rem; border-radius: 12px; 
                     box-shadow: 0 4px 20px rgba(0,0,0,0.1); margin: 2rem 0;'>
@@ -258,5 +336,13 @@ class SimpleAuthenticator:
                     self.logout()
                     st.rerun()
 
-# Instância global
-authenticator = SimpleAuthenticator()
\ No newline at end of file
+@st.cache_resource
+def get_authenticator() -> SimpleAuthenticator:
+    """Autenticador compartilhado por processo (estado por sessão fica em st.session_state)"""
+    return SimpleAuthenticator()
+
+def __getattr__(name: str):
+    """Mantém `authenticator` (global público antigo) como alias da instância em cache"""
+    if name == 'authenticator':
+        return get_authenticator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -5,10 +5,15 @@ Otimizado para queries SQL e dados financeiros
 import streamlit as st
 import hashlib
 import json
+import logging
+import time
+import pickle
 import pandas as pd
+import numpy as np
 from typing import Any, Dict, List, Optional, Tuple, Callable
 from datetime import datetime, timedelta
 from functools import wraps
+from collections import OrderedDict
 
 from .logging_utils import Log
 
@@ -20,17 +25,41 @@ class CacheManager:
     @staticmethod
     def create_cache_key(*args, **kwargs) -> str:
         """Cria chave única para cache baseada em argumentos"""
-        # Serializar argumentos de forma consistente
-        cache_data = {
-            'args': args,
-            'kwargs': {k: v for k, v in kwargs.items() if k != 'self'}
-        }
+        # Serializar argumentos de forma consistente (kwargs ordenados)
+        cache_data = (
+            tuple(CacheManager._key_part(v) for v in args),
+            tuple((k, CacheManager._key_part(v)) for k, v in sorted(kwargs.items()) if k != 'self')
+        )
         
-        # Converter para string JSON ordenada
-        cache_str = json.dumps(cache_data, sort_keys=True, default=str)
+        try:
+            # Pickle binário em C (aceita datas e demais tipos sem conversão para str)
+            cache_bytes = pickle.dumps(cache_data, protocol=5)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Argumentos não serializáveis (locks, conexões, lambdas, self posicional): via str
+            cache_bytes = json.dumps(cache_data, sort_keys=True, default=str).encode('utf-8')
         
-        # Hash MD5 para chave compacta
-        return hashlib.md5(cache_str.encode()).hexdigest()
+        # Hash BLAKE2b de 128 bits para chave compacta
+        return hashlib.blake2b(cache_bytes, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _key_part(value: Any) -> Any:
+        """Forma canônica do argumento: dicts/sets ordenados e DataFrames/ndarrays reduzidos a bytes"""
+        if isinstance(value, dict):
+            # Dicts iguais com ordem de inserção diferente geram a mesma chave
+            items = ((repr(k), CacheManager._key_part(v)) for k, v in value.items())
+            return ('dict', tuple(sorted(items, key=lambda item: item[0])))
+        if isinstance(value, (set, frozenset)):
+            return ('set', tuple(sorted((CacheManager._key_part(v) for v in value), key=repr)))
+        if isinstance(value, list):
+            return [CacheManager._key_part(v) for v in value]
+        if isinstance(value, tuple):
+            return tuple(CacheManager._key_part(v) for v in value)
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            columns = tuple(value.columns) if isinstance(value, pd.DataFrame) else value.name
+            return (type(value).__name__, columns, pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        if isinstance(value, np.ndarray):
+            return ('ndarray', value.dtype.str, value.shape, value.tobytes())
+        return value
     
     @staticmethod
     def cache_query_data(ttl: int = 1800):
@@ -41,7 +70,7 @@ class CacheManager:
             def wrapper(*args, **kwargs):
                 try:
                     result = func(*args, **kwargs)
-                    if isinstance(result, pd.DataFrame) and not result.empty:
+                    if logger.isEnabledFor(logging.DEBUG) and isinstance(result, pd.DataFrame) and not result.empty:
                         logger.debug(f"Cache hit para {func.__name__}: {len(result)} registros")
                     return result
                 except Exception as e:
@@ -59,7 +88,8 @@ class CacheManager:
             def wrapper(*args, **kwargs):
                 try:
                     result = func(*args, **kwargs)
-                    logger.debug(f"Métricas calculadas para {func.__name__}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Métricas calculadas para {func.__name__}")
                     return result
                 except Exception as e:
                     logger.error(f"Erro ao calcular métricas {func.__name__}: {str(e)}")
@@ -72,11 +102,13 @@ class CacheManager:
         """Decorator para dados que mudam pouco (fundos, custodiantes)"""
         def decorator(func: Callable):
             @wraps(func)
-            @st.cache_data(ttl=ttl, hash_funcs={object: id})  # Use object ID for hashing
+            # Hash por conteúdo do Streamlit; argumentos não hasheáveis devem usar prefixo "_"
+            @st.cache_data(ttl=ttl)
             def wrapper(*args, **kwargs):
                 try:
                     result = func(*args, **kwargs)
-                    logger.debug(f"Dados estáticos carregados: {func.__name__}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Dados estáticos carregados: {func.__name__}")
                     return result
                 except Exception as e:
                     logger.error(f"Erro ao carregar dados estáticos {func.__name__}: {str(e)}")
@@ -111,49 +143,60 @@ class CacheManager:
 class PerformanceMonitor:
     """Monitor de performance para queries e operações"""
     
+    SLOW_OPERATION_SECONDS = 5.0
+    MAX_RECORDS = 256
+    
+    @staticmethod
+    def _record(operation_name: str, metrics: Dict[str, Any]):
+        """Armazena métrica na sessão com evicção LRU por operação"""
+        if '_performance_metrics' not in st.session_state:
+            st.session_state._performance_metrics = OrderedDict()
+        
+        records = st.session_state._performance_metrics
+        records[operation_name] = metrics
+        records.move_to_end(operation_name)
+        if len(records) > PerformanceMonitor.MAX_RECORDS:
+            records.popitem(last=False)
+    
     @staticmethod
     def time_operation(operation_name: str):
         """Decorator para monitorar tempo de execução"""
         def decorator(func: Callable):
             @wraps(func)
             def wrapper(*args, **kwargs):
-                start_time = datetime.now()
+                start_ns = time.perf_counter_ns()
                 
                 try:
                     result = func(*args, **kwargs)
-                    duration = (datetime.now() - start_time).total_seconds()
+                    duration = (time.perf_counter_ns() - start_ns) / 1e9
+                    slow = duration > PerformanceMonitor.SLOW_OPERATION_SECONDS
                     
                     # Log performance
-                    if duration > 5.0:  # Operações lentas (> 5s)
+                    if slow:
                         logger.warning(f"Operação lenta - {operation_name}: {duration:.2f}s")
-                    else:
+                    elif logger.isEnabledFor(logging.DEBUG):
                         logger.debug(f"Performance - {operation_name}: {duration:.2f}s")
                     
-                    # Armazenar métricas na sessão
-                    if '_performance_metrics' not in st.session_state:
-                        st.session_state._performance_metrics = {}
-                    
-                    st.session_state._performance_metrics[operation_name] = {
-                        'duration': duration,
-                        'timestamp': datetime.now(),
-                        'success': True
-                    }
+                    # Armazenar métricas na sessão apenas para operações lentas ou em debug
+                    if slow or logger.isEnabledFor(logging.DEBUG):
+                        PerformanceMonitor._record(operation_name, {
+                            'duration': duration,
+                            'timestamp': time.time(),
+                            'success': True
+                        })
                     
                     return result
                     
                 except Exception as e:
-                    duration = (datetime.now() - start_time).total_seconds()
+                    duration = (time.perf_counter_ns() - start_ns) / 1e9
                     logger.error(f"Erro na operação {operation_name} após {duration:.2f}s: {str(e)}")
                     
-                    if '_performance_metrics' not in st.session_state:
-                        st.session_state._performance_metrics = {}
-                    
-                    st.session_state._performance_metrics[operation_name] = {
+                    PerformanceMonitor._record(operation_name, {
                         'duration': duration,
-                        'timestamp': datetime.now(),
+                        'timestamp': time.time(),
                         'success': False,
                         'error': str(e)
-                    }
+                    })
                     raise
                     
             return wrapper
@@ -161,8 +204,12 @@ class PerformanceMonitor:
     
     @staticmethod
     def get_performance_metrics() -> Dict[str, Any]:
-        """Obtém métricas de performance da sessão"""
-        return st.session_state.get('_performance_metrics', {})
+        """Obtém métricas de performance da sessão (última execução por operação)"""
+        # Timestamps armazenados como epoch; conversão para datetime só na leitura
+        return {
+            name: {**metrics, 'timestamp': datetime.fromtimestamp(metrics['timestamp'])}
+            for name, metrics in st.session_state.get('_performance_metrics', {}).items()
+        }
     
     @staticmethod
     def clear_performance_metrics():
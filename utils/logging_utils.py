@@ -3,11 +3,14 @@ Módulo de logging padronizado conforme CLAUDE.md
 Thread-safe logging com múltiplos níveis e saídas
 """
 import os
+import atexit
 import logging
+import queue
 import threading
 import sys
 from enum import Enum
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
 from pathlib import Path
 
 class LogLevel(Enum):
@@ -23,7 +26,10 @@ class Log:
     _console_output = True
     _log_file = None
     _level = LogLevel.INFO
-    _formatter = None
+    _formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    _queue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(_queue)
+    _listener = None
     
     @classmethod  
     def set_level(cls, level):
@@ -39,6 +45,7 @@ class Log:
     def set_console_output(cls, enabled: bool):
         with cls._lock:
             cls._console_output = enabled
+            cls._restart_listener()
     
     @classmethod
     def set_log_file(cls, file_path: str, append: bool = True):
@@ -48,42 +55,86 @@ class Log:
             # Criar diretório se não existir
             log_dir = Path(file_path).parent
             log_dir.mkdir(parents=True, exist_ok=True)
+            cls._restart_listener()
+    
+    @classmethod
+    def _build_output_handlers(cls) -> List[logging.Handler]:
+        """Cria handlers de saída (console/arquivo) consumidos pela thread de escrita"""
+        handlers = []
+        
+        # Console handler
+        if cls._console_output:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(cls._formatter)
+            handlers.append(console_handler)
+        
+        # File handler
+        if cls._log_file:
+            try:
+                file_handler = logging.FileHandler(cls._log_file, mode='a')
+                file_handler.setFormatter(cls._formatter)
+                handlers.append(file_handler)
+            except Exception as e:
+                # Fallback silencioso para stderr em caso de erro de log file
+                fallback_handler = logging.StreamHandler(sys.stderr)
+                fallback_handler.setFormatter(cls._formatter)
+                handlers.append(fallback_handler)
+        
+        return handlers
+    
+    @classmethod
+    def _start_listener(cls):
+        """Inicia a thread que escreve os registros enfileirados (chamar com _lock)"""
+        if cls._listener is None:
+            cls._listener = QueueListener(cls._queue, *cls._build_output_handlers())
+            cls._listener.start()
+    
+    @classmethod
+    def _stop_listener(cls):
+        """Esvazia a fila e fecha handlers de saída"""
+        listener = cls._listener
+        if listener is not None:
+            cls._listener = None
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+    
+    @classmethod
+    def _restart_listener(cls):
+        """Reaplica configuração de saída se a thread já estiver ativa (chamar com _lock)"""
+        if cls._listener is not None:
+            cls._stop_listener()
+            cls._start_listener()
+    
+    @classmethod
+    def _install_root_handler(cls):
+        """Anexa uma única vez o QueueHandler compartilhado ao root logger (chamar com _lock)"""
+        root = logging.getLogger()
+        if cls._queue_handler not in root.handlers:
+            # Threads de requisição apenas enfileiram; I/O ocorre na thread do listener
+            cls._start_listener()
+            root.addHandler(cls._queue_handler)
+            root.setLevel(cls._level.value)
     
     @classmethod
     def get_logger(cls, name: str) -> logging.Logger:
+        # Caminho rápido sem lock para loggers já criados
+        cached = cls._loggers.get(name)
+        if cached is not None:
+            return cached
+        
         with cls._lock:
             if name not in cls._loggers:
                 logger = logging.getLogger(name)
                 logger.setLevel(cls._level.value)
                 logger.handlers.clear()
                 
-                # Formatter padrão
-                if cls._formatter is None:
-                    cls._formatter = logging.Formatter(
-                        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-                    )
-                
-                # Console handler
-                if cls._console_output:
-                    console_handler = logging.StreamHandler(sys.stdout)
-                    console_handler.setFormatter(cls._formatter)
-                    console_handler.setLevel(cls._level.value)
-                    logger.addHandler(console_handler)
-                
-                # File handler
-                if cls._log_file:
-                    try:
-                        file_handler = logging.FileHandler(cls._log_file, mode='a' if True else 'w')
-                        file_handler.setFormatter(cls._formatter)
-                        file_handler.setLevel(cls._level.value)
-                        logger.addHandler(file_handler)
-                    except Exception as e:
-                        # Fallback para stderr
-                        fallback_handler = logging.StreamHandler(sys.stderr)
-                        fallback_handler.setFormatter(cls._formatter)
-                        logger.addHandler(fallback_handler)
-                        # Fallback silencioso para stderr em caso de erro de log file
+                # Saída herdada do handler compartilhado no root via propagação
+                cls._install_root_handler()
                 
                 cls._loggers[name] = logger
             
-            return cls._loggers[name]
\ No newline at end of file
+            return cls._loggers[name]
+
+# Garante escrita dos registros pendentes ao encerrar o processo
+atexit.register(Log._stop_listener)
\ No newline at end of file
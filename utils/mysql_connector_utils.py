@@ -3,22 +3,300 @@ Módulo MySQL padronizado conforme CLAUDE.md
 Pool de conexões thread-safe com retry e logging robusto
 """
 import os
+import re
+import logging
+import csv
 import time
+import tempfile
 import threading
-from typing import Any, Dict, List, Optional, Tuple, Union
+import weakref
+from bisect import bisect_right
+from itertools import accumulate
+from collections import OrderedDict, deque, namedtuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 import mysql.connector
 from mysql.connector import pooling
+from mysql.connector.constants import FieldType
 import pandas as pd
 from contextlib import contextmanager
+from functools import lru_cache, wraps
 
 from .logging_utils import Log
 
 logger = Log.get_logger(__name__)
 
+# INSERT/REPLACE de uma única tupla VALUES; execute_many monta o multi-VALUES por lote
+# (o executemany do driver só reescreve INSERT [IGNORE] INTO ... VALUES, não REPLACE/VALUE)
+_INSERT_VALUES_RE = re.compile(
+    r"\s*((?:INSERT|REPLACE)\b.+\bVALUES?\s*)"
+    r"(\(\s*(?:%s|%\(.+?\)s)\s*(?:,\s*(?:%s|%\(.+?\)s)\s*)*\))"
+    r"(\s*(?:ON DUPLICATE.*)?)\s*\Z",
+    re.I | re.S
+)
+
+@lru_cache(maxsize=256)
+def _parse_insert(query: str) -> Optional[Tuple[str, str, str]]:
+    """(prefixo, tupla VALUES, sufixo) do INSERT/REPLACE, em cache por texto da query"""
+    match = _INSERT_VALUES_RE.match(query)
+    return match.groups() if match else None
+
+# Único diretório de onde o driver aceita LOAD DATA LOCAL INFILE
+# (barras normais: "\" de caminhos Windows viraria escape no literal SQL, ex.: \t -> TAB)
+_BULK_LOAD_DIR = os.path.join(tempfile.gettempdir(), 'mysql_bulk_load').replace('\\', '/')
+
+def _quote_string(value: str) -> str:
+    """Literal de string SQL com \\ e ' escapados"""
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+def _quote_identifier(name: str) -> str:
+    """Cita identificador (tabela, schema.tabela ou coluna) com crases"""
+    return '.'.join('`' + part.replace('`', '``') + '`' for part in str(name).split('.'))
+
+def _to_load_data_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Serializa colunas no formato do LOAD DATA: \\N para nulos e escape de \\, tab e quebra de linha"""
+    serialized = {}
+    for name, column in df.items():
+        # Booleanos como 0/1 (MySQL não converte 'True'/'False' para TINYINT)
+        if pd.api.types.is_bool_dtype(column):
+            column = column.astype('Int8')
+        elif column.dtype == object:
+            column = column.map(lambda value: int(value) if isinstance(value, bool) else value)
+        
+        text = (
+            column.astype(str)
+            .str.replace('\\', '\\\\', regex=False)
+            .str.replace('\t', '\\t', regex=False)
+            .str.replace('\n', '\\n', regex=False)
+        )
+        serialized[name] = text.where(column.notna(), '\\N')
+    return pd.DataFrame(serialized, index=df.index)
+
+@lru_cache(maxsize=256)
+def _row_type(columns: Tuple[str, ...]) -> type:
+    """namedtuple das colunas do resultado, em cache (rename cobre nomes como COUNT(*))"""
+    return namedtuple('Row', columns, rename=True)
+
+# Tipos não inteiros tipados como float64 já na leitura (DECIMAL chega como objeto Decimal)
+_FLOAT_FIELD_TYPES = frozenset((FieldType.DECIMAL, FieldType.NEWDECIMAL, FieldType.FLOAT, FieldType.DOUBLE))
+
+# CR_SERVER_GONE_ERROR, CR_SERVER_LOST, CR_SERVER_LOST_EXTENDED
+_CONNECTION_LOST_ERRNOS = (2006, 2013, 2055)
+
+def _is_connection_lost(error: Exception) -> bool:
+    """Indica erro de conexão perdida (conexão deve ser descartada)"""
+    return getattr(error, 'errno', None) in _CONNECTION_LOST_ERRNOS
+
+def _retry_on_connection_lost(func: Callable) -> Callable:
+    """Repete uma vez leituras que falharam por conexão perdida, com conexão recém-aberta
+    
+    Escritas não são repetidas (poderiam duplicar linhas): falham uma vez e as seguintes
+    já recebem conexões novas, pois get_connection fecha as ociosas ao detectar a perda.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        except mysql.connector.Error as e:
+            # errno decide: 2006 chega como DatabaseError e 2013 como OperationalError
+            if not _is_connection_lost(e):
+                raise
+            logger.warning(f"Conexão perdida em {func.__name__}, repetindo: {str(e)}")
+            return func(self, *args, **kwargs)
+    return wrapper
+
+class _FastPool:
+    """Pool LIFO de conexões: lock só na lista livre (sem I/O sob o lock) e tamanho adaptativo"""
+    
+    # Avaliação do tamanho: janela, limiares de espera (s) e histerese
+    RESIZE_INTERVAL = 5.0
+    GROW_WAIT_P99 = 0.020
+    SHRINK_WAIT_P99 = 0.001
+    SHRINK_IDLE_SECONDS = 60.0
+    HYSTERESIS = 2
+    
+    def __init__(self, pool_size: int, max_pool_size: Optional[int] = None, **connect_kwargs):
+        self.pool_size = pool_size
+        self.min_size = pool_size
+        self.max_size = max(max_pool_size or pool_size, pool_size)
+        self._connect_kwargs = connect_kwargs
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._in_use = 0
+        
+        # Métricas de espera no acquire para o dimensionamento
+        self._wait_hist = deque(maxlen=1000)
+        self._last_resize = time.monotonic()
+        self._last_saturated = self._last_resize
+        self._grow_votes = 0
+        self._shrink_votes = 0
+        
+        try:
+            for _ in range(pool_size):
+                self._idle.append(self._connect())
+        except Exception:
+            # Falha no meio da criação: fechar as já abertas para não vazar entre retentativas
+            self.drop_idle()
+            raise
+    
+    def _connect(self):
+        """Abre uma conexão nova com a configuração do pool"""
+        return mysql.connector.connect(**self._connect_kwargs)
+    
+    def connect_unpooled(self, **overrides):
+        """Abre conexão fora do pool com a configuração do pool mais ajustes (fechar após o uso)"""
+        return mysql.connector.connect(**{**self._connect_kwargs, **overrides})
+    
+    def _maybe_resize(self, now: float):
+        """Ajusta o tamanho pelo p99 da espera no acquire (avaliação preguiçosa; chamar com _lock)"""
+        if now - self._last_resize < self.RESIZE_INTERVAL or not self._wait_hist:
+            return
+        self._last_resize = now
+        
+        waits = sorted(self._wait_hist)
+        p99 = waits[min(len(waits) - 1, int(len(waits) * 0.99))]
+        self._wait_hist.clear()
+        
+        saturated = not self._idle and self._in_use >= self.pool_size
+        if saturated:
+            self._last_saturated = now
+        
+        self._grow_votes = self._grow_votes + 1 if p99 > self.GROW_WAIT_P99 and saturated else 0
+        self._shrink_votes = (
+            self._shrink_votes + 1
+            if p99 < self.SHRINK_WAIT_P99 and now - self._last_saturated > self.SHRINK_IDLE_SECONDS
+            else 0
+        )
+        
+        if self._grow_votes >= self.HYSTERESIS and self.pool_size < self.max_size:
+            self.pool_size = min(self.max_size, self.pool_size + max(1, self.pool_size // 2))
+            self._grow_votes = 0
+            self._available.notify_all()
+            logger.info(f"Pool MySQL ampliado para {self.pool_size} conexões (p99 espera {p99 * 1000:.1f}ms)")
+        elif self._shrink_votes >= self.HYSTERESIS and self.pool_size > self.min_size:
+            self.pool_size -= 1
+            self._shrink_votes = 0
+            logger.info(f"Pool MySQL reduzido para {self.pool_size} conexões")
+    
+    def acquire(self, timeout: Optional[float] = None):
+        """Obtém a conexão devolvida mais recentemente (ou abre uma nova)"""
+        start = time.monotonic()
+        with self._available:
+            if not self._available.wait_for(lambda: self._in_use < self.pool_size, timeout=timeout):
+                raise pooling.PoolError("Pool de conexões esgotado")
+            
+            self._in_use += 1
+            connection = self._idle.pop() if self._idle else None
+            now = time.monotonic()
+            self._wait_hist.append(now - start)
+            self._maybe_resize(now)
+            
+            # Após redução, fechar conexões ociosas excedentes (fora do lock)
+            surplus = []
+            while self._idle and len(self._idle) + self._in_use > self.pool_size:
+                surplus.append(self._idle.popleft())
+        
+        self._close_all(surplus)
+        
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                self._free_slot()
+                raise
+        return connection
+    
+    def _free_slot(self):
+        """Libera uma vaga de checkout"""
+        with self._available:
+            self._in_use -= 1
+            self._available.notify()
+    
+    def release(self, connection):
+        """Devolve conexão à lista livre (descartada se o rollback falhar)"""
+        keep = False
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            keep = True
+        except Exception as e:
+            logger.warning(f"Rollback falhou ao devolver conexão, descartando: {str(e)}")
+        finally:
+            with self._available:
+                self._in_use -= 1
+                keep = keep and len(self._idle) + self._in_use < self.pool_size
+                if keep:
+                    self._idle.append(connection)
+                self._available.notify()
+        
+        if not keep:
+            self._close_all([connection])
+    
+    def discard(self, connection):
+        """Descarta conexão inválida liberando sua vaga no pool"""
+        try:
+            connection._stmt_cache = None
+            connection._shared_cursor = connection._shared_dict_cursor = None
+            self._close_all([connection])
+        finally:
+            self._free_slot()
+    
+    def _close_all(self, connections):
+        """Fecha conexões ignorando erros"""
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+    
+    def drop_idle(self):
+        """Fecha conexões ociosas (próximos acquire abrem conexões novas)"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        self._close_all(idle)
+    
+    def close(self):
+        """Fecha conexões ociosas"""
+        self.drop_idle()
+
+@lru_cache(maxsize=1)
+def _env_config() -> Dict[str, Any]:
+    """Configuração padrão das variáveis de ambiente, lida uma única vez"""
+    max_pool_size = os.getenv('DB_POOL_MAX_SIZE')
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER', 'root'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'database': os.getenv('DB_NAME', 'DW_STAGING'),
+        'port': int(os.getenv('DB_PORT', 3306)),
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'max_pool_size': int(max_pool_size) if max_pool_size else None,
+        'compress': os.getenv('DB_COMPRESS', '0') == '1'
+    }
+
+class _PoolHolder:
+    """Pool de um destino (host, porta, banco, usuário), criado sob lock próprio"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pool = None
+        self.max_allowed_packet = None
+
 class MySQLConnector:
-    _instance = None
+    _instances: Dict[Tuple, "MySQLConnector"] = {}
     _lock = threading.Lock()
-    _pool = None
+    _pools: Dict[Tuple, _PoolHolder] = {}
+    
+    # Linhas por lote ao montar DataFrames a partir do cursor
+    DF_FETCH_SIZE = 50000
+    
+    # Statements preparados mantidos por conexão
+    STMT_CACHE_SIZE = 64
+    
+    # Bytes reservados para cabeçalho do pacote nos INSERT multi-VALUES
+    PACKET_MARGIN = 1024
     
     def __init__(
         self,
@@ -29,20 +307,25 @@ class MySQLConnector:
         port: int = 3306,
         pool_size: int = 10,
         pool_timeout: int = 30,
+        max_pool_size: int = None,
         max_retries: int = 3
     ):
+        env = _env_config()
+        pool_size = pool_size or env['pool_size']
         self.config = {
-            'host': host or os.getenv('DB_HOST', 'localhost'),
-            'user': user or os.getenv('DB_USER', 'root'),
-            'password': password or os.getenv('DB_PASSWORD', ''),
-            'database': database or os.getenv('DB_NAME', 'DW_STAGING'),
-            'port': port or int(os.getenv('DB_PORT', 3306)),
-            'pool_size': pool_size or int(os.getenv('DB_POOL_SIZE', 10)),
-            'pool_timeout': pool_timeout or int(os.getenv('DB_POOL_TIMEOUT', 30)),
+            'host': host or env['host'],
+            'user': user or env['user'],
+            'password': password or env['password'],
+            'database': database or env['database'],
+            'port': port or env['port'],
+            'pool_size': pool_size,
+            'pool_timeout': pool_timeout or env['pool_timeout'],
+            'max_pool_size': max_pool_size or env['max_pool_size'] or 2 * pool_size,
             'charset': 'utf8mb4',
             'collation': 'utf8mb4_unicode_ci',
             'autocommit': True,
             'connect_timeout': 10,
+            'compress': env['compress'],
             'buffered': True
         }
         self.max_retries = max_retries
@@ -50,9 +333,21 @@ class MySQLConnector:
     
     def _initialize_pool(self):
         """Inicializa pool de conexões com retry"""
+        # Lock global só para registrar o destino; criação do pool sob o lock do destino
+        key = (self.config['host'], self.config['port'], self.config['database'], self.config['user'])
+        
+        # Caminho rápido sem lock: destino já registrado com pool pronto
+        holder = MySQLConnector._pools.get(key)
+        if holder is not None and holder.pool is not None:
+            self._holder, self.pool = holder, holder.pool
+            return
+        
         with MySQLConnector._lock:
-            if MySQLConnector._pool is not None:
-                self.pool = MySQLConnector._pool
+            self._holder = MySQLConnector._pools.setdefault(key, _PoolHolder())
+        
+        with self._holder.lock:
+            if self._holder.pool is not None:
+                self.pool = self._holder.pool
                 return
             
             retry_delay = 2
@@ -62,9 +357,8 @@ class MySQLConnector:
                     logger.info(f"Inicializando pool MySQL - tentativa {attempt + 1}")
                     
                     pool_config = {
-                        'pool_name': 'mysql_pool',
                         'pool_size': self.config['pool_size'],
-                        'pool_reset_session': True,
+                        'max_pool_size': self.config['max_pool_size'],
                         'host': self.config['host'],
                         'user': self.config['user'],
                         'password': self.config['password'],
@@ -73,16 +367,22 @@ class MySQLConnector:
                         'charset': self.config['charset'],
                         'collation': self.config['collation'],
                         'autocommit': self.config['autocommit'],
-                        'connect_timeout': self.config['connect_timeout']
+                        'connect_timeout': self.config['connect_timeout'],
+                        # Compressão zlib do protocolo (DB_COMPRESS=1) feita pela extensão C
+                        'compress': self.config['compress'],
+                        'use_pure': False
                     }
                     
-                    MySQLConnector._pool = mysql.connector.pooling.MySQLConnectionPool(**pool_config)
-                    self.pool = MySQLConnector._pool
+                    self._holder.pool = _FastPool(**pool_config)
+                    self.pool = self._holder.pool
+                    
+                    # Teste de conexão (as conexões do pool são abertas na criação)
+                    test_conn = self.pool.acquire()
+                    self.pool.release(test_conn)
                     
-                    # Teste de conexão
-                    test_conn = self.pool.get_connection()
-                    test_conn.ping(reconnect=True)
-                    test_conn.close()
+                    # Sem a extensão C o driver decodifica cada célula em Python puro
+                    if not getattr(mysql.connector, 'HAVE_CEXT', False):
+                        logger.warning("Extensão C do mysql-connector indisponível - usando implementação pura (fetch mais lento)")
                     
                     logger.info("Pool MySQL inicializado com sucesso")
                     return
@@ -98,67 +398,175 @@ class MySQLConnector:
     
     @contextmanager
     def get_connection(self):
-        """Context manager para conexões"""
+        """Context manager para conexões (sem ping: conexões perdidas são descartadas no erro)"""
         connection = None
+        connection_lost = False
         try:
-            connection = self.pool.get_connection()
-            connection.ping(reconnect=True)
+            connection = self.pool.acquire(timeout=self.config['pool_timeout'])
             yield connection
         except Exception as e:
             logger.error(f"Erro na conexão: {str(e)}")
-            if connection:
-                connection.rollback()
+            # Erro fora da lista de errnos (ex.: InterfaceError "Connection not available")
+            # também descarta a conexão se ela não responde mais
+            connection_lost = connection is not None and (_is_connection_lost(e) or not self._is_alive(connection))
+            if connection_lost:
+                # Ociosas foram abertas antes da queda (restart/wait_timeout) e tendem a estar mortas
+                self.pool.drop_idle()
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            if connection:
+                if connection_lost:
+                    self.pool.discard(connection)
+                else:
+                    self.pool.release(connection)
     
-    def execute_query(self, query: str, params: Optional[Tuple] = None) -> List[Dict[str, Any]]:
-        """Executa query e retorna lista de dicts"""
+    @staticmethod
+    def _is_alive(connection) -> bool:
+        """Verifica (só no caminho de erro) se a conexão ainda responde"""
+        try:
+            return connection.is_connected()
+        except Exception:
+            return False
+    
+    def _shared_cursor(self, conn, dictionary: bool = False):
+        """Cursor persistente da conexão, reaproveitado entre chamadas (fechado junto com a conexão)"""
+        attr = '_shared_dict_cursor' if dictionary else '_shared_cursor'
+        cursor = getattr(conn, attr, None)
+        if cursor is None:
+            # Dict sem buffer (linhas vão direto para a lista do execute_query); demais bufferizados
+            cursor = conn.cursor(dictionary=True, buffered=False) if dictionary else conn.cursor(buffered=True)
+            setattr(conn, attr, cursor)
+        return cursor
+    
+    def _prepared_cursor(self, conn, query: str, dictionary: bool = False):
+        """Cursor preparado em cache LRU na própria conexão (plano reaproveitado pelo servidor)"""
+        cache = getattr(conn, '_stmt_cache', None)
+        if cache is None:
+            cache = conn._stmt_cache = OrderedDict()
+        
+        key = (query, dictionary)
+        cursor = cache.get(key)
+        if cursor is not None:
+            cache.move_to_end(key)
+            return cursor
+        
+        cursor = conn.cursor(prepared=True, dictionary=dictionary)
+        cache[key] = cursor
+        if len(cache) > self.STMT_CACHE_SIZE:
+            _, evicted = cache.popitem(last=False)
+            evicted.close()
+        return cursor
+    
+    @_retry_on_connection_lost
+    def execute_query(self, query: str, params: Optional[Tuple] = None,
+                      mode: str = 'tuple') -> List[Union[Tuple, Dict[str, Any]]]:
+        """Executa query e retorna linhas como tuplas, dicts (mode='dict') ou namedtuples (mode='namedtuple')"""
+        if mode not in ('tuple', 'dict', 'namedtuple'):
+            raise ValueError(f"Modo de retorno inválido: {mode}")
+        
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor(dictionary=True, buffered=True)
-                
+                dictionary = mode == 'dict'
                 if params:
+                    # Statement preparado reaproveitado por conexão: só os parâmetros trafegam
+                    cursor = self._prepared_cursor(conn, query, dictionary=dictionary)
                     cursor.execute(query, params)
+                    results = cursor.fetchall()
                 else:
+                    # Dict sem buffer do driver: linhas convertidas direto na lista de resultado
+                    cursor = self._shared_cursor(conn, dictionary=dictionary)
                     cursor.execute(query)
+                    results = cursor.fetchall()
                 
-                results = cursor.fetchall()
-                cursor.close()
+                if mode == 'namedtuple' and cursor.description:
+                    row_type = _row_type(tuple(d[0] for d in cursor.description))
+                    results = [row_type._make(row) for row in results]
                 
-                logger.debug(f"Query executada: {len(results)} resultados")
+                logger.debug("Query executada: %d resultados", len(results))
                 return results
                 
         except Exception as e:
             logger.error(f"Erro ao executar query: {str(e)}")
-            logger.debug(f"Query: {query}")
-            logger.debug(f"Params: {params}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query: %s", query)
+                logger.debug("Params: %s", params)
             raise
     
-    def execute_query_df(self, query: str, params: Optional[Tuple] = None) -> pd.DataFrame:
-        """Executa query e retorna DataFrame pandas"""
-        try:
-            with self.get_connection() as conn:
+    def iter_query(self, query: str, params: Optional[Tuple] = None,
+                   chunksize: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """Itera resultado em lotes de dicts com cursor sem buffer (memória O(chunksize))"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            try:
                 if params:
-                    df = pd.read_sql(query, conn, params=params)
+                    cursor.execute(query, params)
                 else:
-                    df = pd.read_sql(query, conn)
+                    cursor.execute(query)
                 
-                logger.debug(f"Query executada: {len(df)} registros no DataFrame")
-                return df
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                # Descartar linhas não lidas antes de devolver a conexão ao pool
+                if conn.unread_result:
+                    conn.consume_results()
+                cursor.close()
+    
+    @_retry_on_connection_lost
+    def _read_df(self, query: str, params: Optional[Tuple] = None,
+                 chunksize: Optional[int] = None) -> pd.DataFrame:
+        """Lê resultado da query em DataFrame direto do cursor, em lotes de tuplas"""
+        frames = []
+        with self.get_connection() as conn:
+            cursor = self._prepared_cursor(conn, query) if params else conn.cursor(buffered=False)
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
                 
+                description = cursor.description or []
+                columns = [d[0] for d in description]
+                # dtype pela descrição do cursor, sem inferência sobre objetos Python
+                dtypes = {d[0]: 'float64' for d in description if d[1] in _FLOAT_FIELD_TYPES}
+                while True:
+                    rows = cursor.fetchmany(chunksize or self.DF_FETCH_SIZE)
+                    if not rows:
+                        break
+                    frame = pd.DataFrame.from_records(rows, columns=columns)
+                    frames.append(frame.astype(dtypes) if dtypes else frame)
+            finally:
+                if conn.unread_result:
+                    conn.consume_results()
+                if not params:
+                    cursor.close()
+        
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    
+    def execute_query_df(self, query: str, params: Optional[Tuple] = None,
+                         chunksize: Optional[int] = None) -> pd.DataFrame:
+        """Executa query e retorna DataFrame pandas"""
+        try:
+            df = self._read_df(query, params, chunksize)
+            logger.debug("Query executada: %d registros no DataFrame", len(df))
+            return df
+        
         except Exception as e:
             logger.error(f"Erro ao executar query_df: {str(e)}")
-            logger.debug(f"Query: {query}")
-            logger.debug(f"Params: {params}")
-            return pd.DataFrame()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query: %s", query)
+                logger.debug("Params: %s", params)
+            raise
     
     def execute_update(self, query: str, params: Optional[Tuple] = None) -> int:
         """Executa query de atualização/inserção"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor(buffered=True)
+                cursor = self._shared_cursor(conn)
                 
                 if params:
                     cursor.execute(query, params)
@@ -166,41 +574,188 @@ class MySQLConnector:
                     cursor.execute(query)
                 
                 affected_rows = cursor.rowcount
-                conn.commit()
-                cursor.close()
+                if not self.config['autocommit']:
+                    conn.commit()
                 
-                logger.info(f"Update executado: {affected_rows} linhas afetadas")
+                logger.info("Update executado: %d linhas afetadas", affected_rows)
                 return affected_rows
                 
         except Exception as e:
             logger.error(f"Erro ao executar update: {str(e)}")
-            logger.debug(f"Query: {query}")
-            logger.debug(f"Params: {params}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query: %s", query)
+                logger.debug("Params: %s", params)
+            raise
+    
+    def execute_update_batch(self, statements: List[Tuple[str, Optional[Tuple]]]) -> int:
+        """Executa várias atualizações em uma transação com um único commit (preferir a N execute_update)"""
+        try:
+            with self.get_connection() as conn:
+                cursor = self._shared_cursor(conn)
+                conn.autocommit = False
+                try:
+                    affected_rows = 0
+                    for query, params in statements:
+                        if params:
+                            cursor.execute(query, params)
+                        else:
+                            cursor.execute(query)
+                        affected_rows += cursor.rowcount
+                    conn.commit()
+                except Exception:
+                    # Desfazer antes de religar autocommit (que confirmaria a transação aberta)
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.autocommit = self.config['autocommit']
+                
+                logger.info("Update em lote: %d comandos, %d linhas afetadas", len(statements), affected_rows)
+                return affected_rows
+        
+        except Exception as e:
+            logger.error(f"Erro ao executar update em lote: {str(e)}")
             raise
     
+    def _get_max_allowed_packet(self, conn) -> int:
+        """Lê max_allowed_packet do servidor uma única vez"""
+        if self._holder.max_allowed_packet is None:
+            cursor = self._shared_cursor(conn)
+            cursor.execute("SHOW VARIABLES LIKE 'max_allowed_packet'")
+            result = cursor.fetchone()
+            self._holder.max_allowed_packet = int(result[1]) if result else 4 * 1024 * 1024
+        return self._holder.max_allowed_packet
+    
+    def _render_insert_rows(self, conn, values_template: str, params_list: List, charset: str) -> List[bytes]:
+        """Tuplas VALUES com parâmetros escapados pelo conversor da conexão (bytes, como o driver envia)"""
+        template = values_template.encode(charset)
+        prepare = getattr(conn, 'prepare_for_mysql', None)
+        converter = getattr(conn, 'converter', None)
+        
+        def escape(params):
+            # Extensão C: prepare_for_mysql; conexão pura: to_mysql -> escape -> quote
+            if prepare is not None:
+                return prepare(params)
+            
+            def render(value):
+                return converter.quote(converter.escape(converter.to_mysql(value)))
+            
+            if isinstance(params, dict):
+                return {key: render(value) for key, value in params.items()}
+            return [render(value) for value in params]
+        
+        if isinstance(params_list[0], dict):
+            return [
+                template % {key.encode(charset): value for key, value in escape(params).items()}
+                for params in params_list
+            ]
+        return [template % tuple(escape(params)) for params in params_list]
+    
+    def _split_insert_batches(self, row_sizes: List[int], budget: int) -> List[Tuple[int, int]]:
+        """Intervalos [início, fim) de linhas cujo INSERT multi-VALUES cabe no orçamento de bytes"""
+        # Fronteiras dos lotes por busca binária no tamanho acumulado
+        cumulative = list(accumulate(row_sizes))
+        batches, start, consumed = [], 0, 0
+        while start < len(row_sizes):
+            end = max(start + 1, bisect_right(cumulative, consumed + budget, lo=start))
+            batches.append((start, end))
+            consumed = cumulative[end - 1]
+            start = end
+        return batches
+    
     def execute_many(self, query: str, params_list: List[Tuple]) -> int:
-        """Executa múltiplas queries com parâmetros diferentes"""
+        """Executa múltiplas queries com parâmetros diferentes
+        
+        INSERT/REPLACE vira um statement multi-VALUES por lote abaixo de max_allowed_packet
+        (montado aqui com o escape da conexão). Com autocommit
+        (padrão do pool) cada lote é confirmado ao executar: falha em um lote posterior
+        mantém os anteriores gravados. Sem autocommit, todos os lotes compartilham uma
+        transação com um único commit e rollback em erro.
+        """
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor(buffered=True)
-                cursor.executemany(query, params_list)
+                cursor = self._shared_cursor(conn)
                 
-                affected_rows = cursor.rowcount
-                conn.commit()
-                cursor.close()
+                try:
+                    parsed = _parse_insert(query) if params_list else None
+                    # Placeholders fora da tupla VALUES (ex.: ON DUPLICATE ... = %s) ficam com o driver
+                    if parsed and '%' not in parsed[0] + parsed[2]:
+                        # INSERT/REPLACE: um statement multi-VALUES por lote (escape exato, tamanho exato)
+                        prefix, values_template, suffix = parsed
+                        charset = getattr(conn, 'python_charset', 'utf-8')
+                        rows = self._render_insert_rows(conn, values_template, params_list, charset)
+                        head, tail = prefix.encode(charset), suffix.encode(charset)
+                        budget = self._get_max_allowed_packet(conn) - len(head) - len(tail) - self.PACKET_MARGIN
+                        
+                        affected_rows = 0
+                        for start, end in self._split_insert_batches([len(row) + 1 for row in rows], budget):
+                            cursor.execute(head + b','.join(rows[start:end]) + tail)
+                            affected_rows += cursor.rowcount
+                    else:
+                        cursor.executemany(query, params_list)
+                        affected_rows = cursor.rowcount
+                    
+                    if not self.config['autocommit']:
+                        conn.commit()
+                except Exception:
+                    if not self.config['autocommit']:
+                        conn.rollback()
+                    raise
                 
-                logger.info(f"ExecuteMany: {len(params_list)} operações, {affected_rows} linhas afetadas")
+                # Debug: loops de ETL chamam execute_many milhares de vezes
+                logger.debug("ExecuteMany: %d operações, %d linhas afetadas", len(params_list), affected_rows)
                 return affected_rows
                 
         except Exception as e:
             logger.error(f"Erro ao executar executemany: {str(e)}")
             raise
     
+    def bulk_load_df(self, df: pd.DataFrame, table: str, columns: Optional[List[str]] = None) -> int:
+        """Carrega DataFrame na tabela via LOAD DATA LOCAL INFILE (sem parser SQL por linha)"""
+        columns = list(columns or df.columns)
+        os.makedirs(_BULK_LOAD_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix='.tsv', dir=_BULK_LOAD_DIR)
+        path = path.replace('\\', '/')
+        
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as handle:
+                writer = csv.writer(handle, delimiter='\t', lineterminator='\n',
+                                    quoting=csv.QUOTE_NONE, quotechar=None)
+                writer.writerows(_to_load_data_frame(df[columns]).itertuples(index=False))
+            
+            column_list = ', '.join(_quote_identifier(c) for c in columns)
+            query = (
+                f"LOAD DATA LOCAL INFILE {_quote_string(path)} INTO TABLE {_quote_identifier(table)} "
+                f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                f"LINES TERMINATED BY '\\n' ({column_list})"
+            )
+            
+            # Conexão dedicada: só ela leva a flag LOCAL_FILES, restrita ao diretório de bulk load
+            conn = self.pool.connect_unpooled(allow_local_infile_in_path=_BULK_LOAD_DIR)
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                affected_rows = cursor.rowcount
+                if not self.config['autocommit']:
+                    conn.commit()
+                cursor.close()
+            finally:
+                conn.close()
+            
+            logger.info(f"Bulk load em {table}: {affected_rows} linhas carregadas")
+            return affected_rows
+        
+        except Exception as e:
+            logger.error(f"Erro no bulk load de {table}: {str(e)}")
+            raise
+        finally:
+            os.remove(path)
+    
+    @_retry_on_connection_lost
     def query_single_value(self, query: str, params: Optional[Tuple] = None) -> Any:
         """Executa query e retorna um único valor"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor(buffered=True)
+                cursor = self._shared_cursor(conn)
                 
                 if params:
                     cursor.execute(query, params)
@@ -208,7 +763,6 @@ class MySQLConnector:
                     cursor.execute(query)
                 
                 result = cursor.fetchone()
-                cursor.close()
                 
                 return result[0] if result else None
                 
@@ -220,14 +774,10 @@ class MySQLConnector:
         """Testa conectividade com o banco"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT 1")
-                result = cursor.fetchone()
-                cursor.close()
-                
-                is_connected = result and result[0] == 1
-                logger.info(f"Teste de conexão: {'✅ Sucesso' if is_connected else '❌ Falha'}")
-                return is_connected
+                # COM_PING: um pacote, sem result set nem cursor (ping existe na conexão pura e na extensão C)
+                conn.ping(reconnect=False)
+                logger.info("Teste de conexão: ✅ Sucesso")
+                return True
                 
         except Exception as e:
             logger.error(f"Teste de conexão falhou: {str(e)}")
@@ -236,13 +786,93 @@ class MySQLConnector:
     def close(self):
         """Fecha pool de conexões"""
         try:
-            if MySQLConnector._pool:
-                MySQLConnector._pool = None
+            with self._holder.lock:
+                if self._holder.pool:
+                    self._holder.pool.close()
+                    self._holder.pool = None
                 logger.info("Pool MySQL fechado")
         except Exception as e:
             logger.error(f"Erro ao fechar pool: {str(e)}")
 
+class InsertBuffer:
+    """Acumula linhas de INSERT em memória e grava em lotes multi-VALUES via execute_many"""
+    
+    def __init__(self, connector: MySQLConnector, table: str, columns: List[str],
+                 batch_size: int = 1000, flush_seconds: Optional[float] = 1.0):
+        column_list = ', '.join(_quote_identifier(c) for c in columns)
+        placeholders = ', '.join(['%s'] * len(columns))
+        self.query = f"INSERT INTO {_quote_identifier(table)} ({column_list}) VALUES ({placeholders})"
+        self.connector = connector
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._rows = []
+        self._lock = threading.Lock()
+        self._timer = None
+        
+        # Grava o restante quando o buffer é coletado ou o processo encerra
+        self._finalizer = weakref.finalize(self, InsertBuffer._flush_rows, connector, self.query, self._rows, self._lock)
+    
+    @staticmethod
+    def _flush_rows(connector: MySQLConnector, query: str, rows: List, lock: threading.Lock) -> int:
+        """Grava as linhas pendentes; em erro elas voltam ao buffer"""
+        with lock:
+            pending = rows[:]
+            rows.clear()
+        if not pending:
+            return 0
+        
+        try:
+            return connector.execute_many(query, pending)
+        except Exception:
+            with lock:
+                rows[:0] = pending
+            raise
+    
+    def add(self, row: Tuple) -> int:
+        """Enfileira uma linha; grava quando o lote enche ou após flush_seconds"""
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.batch_size
+            if not full and self._timer is None and self.flush_seconds:
+                self._timer = threading.Timer(self.flush_seconds, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        
+        return self.flush() if full else 0
+    
+    def flush(self) -> int:
+        """Grava imediatamente as linhas pendentes"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self._flush_rows(self.connector, self.query, self._rows, self._lock)
+    
+    def _flush_on_timer(self):
+        """Flush por tempo (thread do Timer): erros só são registrados"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Erro no flush do buffer de inserção ({len(self._rows)} linhas pendentes): {str(e)}")
+    
+    def close(self) -> int:
+        """Grava o restante e desativa o flush automático"""
+        written = self.flush()
+        self._finalizer.detach()
+        return written
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 # Factory function para compatibilidade
 def get_mysql_connector(**kwargs) -> MySQLConnector:
-    """Factory function para criar instância do connector"""
-    return MySQLConnector(**kwargs)
\ No newline at end of file
+    """Retorna o connector compartilhado da configuração (criado na primeira chamada)"""
+    key = tuple(sorted(kwargs.items()))
+    connector = MySQLConnector._instances.get(key)
+    if connector is None:
+        # Corrida na primeira chamada só cria um objeto a mais: o pool do destino é compartilhado
+        connector = MySQLConnector._instances.setdefault(key, MySQLConnector(**kwargs))
+    return connector
\ No newline at end of file